@@ -0,0 +1,182 @@
+"""离线爬取基准测试
+
+在本地模拟服务器（stub_server.StubServer）上运行爬虫，测量各场景的
+章节/秒、每章请求数和峰值内存。每个场景在独立的子进程中运行，峰值内存互不影响。
+
+场景:
+    single  逐篇下载 --singles 篇独立章节
+    series  下载整个系列（--chapters 章）
+    merge   合并 series 场景下载的系列
+    epub    将 series 场景下载的系列导出为 EPUB
+
+用法:
+    python benchmarks/bench_crawl.py
+    python benchmarks/bench_crawl.py --chapters 1000 --workers 8 --latency 0.02 --rate-429 0.01
+    python benchmarks/bench_crawl.py --scenario series --async --json
+    python benchmarks/bench_crawl.py --fixtures 录制数据目录
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, '..', 'src')
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块
+    resource = None
+
+from stub_server import FIRST_ID, StubServer
+
+SCENARIOS = ('single', 'series', 'merge', 'epub')
+
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值内存（MB），无法获取时返回 0"""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_config(args: argparse.Namespace, url: str, download_path: str) -> dict:
+    return {
+        'COOKIE': 'PHPSESSID=benchmark',
+        'DOWNLOAD_PATH': download_path,
+        'BASE_URL': url,
+        'MAX_WORKERS': args.workers,
+        'RATE_LIMIT': args.rate,
+        'RATE_BURST': args.workers,
+        'MAX_RETRIES': 5,
+        'RETRY_DELAY': 0.05,
+        'RETRY_MAX_DELAY': 1,
+        'CONTENT_SOURCE': args.content_source,
+        'STORAGE_FORMAT': args.storage,
+        'SERIES_CACHE_TTL': 0,
+        'SHOW_PROGRESS': False,
+        'LOG_LEVEL': 'ERROR',
+    }
+
+
+def run_scenario(scenario: str, config: dict, options: dict, queue) -> None:
+    """子进程入口：运行一个场景并返回 (处理的章节数, 耗时, 峰值内存)"""
+    sys.path.insert(0, SRC_DIR)
+    from pixiv_crawler import utils
+    utils.setup_logging(config['LOG_LEVEL'])
+
+    start = time.perf_counter()
+    if scenario in ('merge', 'epub'):
+        series_dir = os.path.join(config['DOWNLOAD_PATH'], '基准测试系列')
+        from pixiv_crawler.epub import export_epub
+        from pixiv_crawler.index import open_download_index
+        if scenario == 'epub':
+            output = export_epub(series_dir, 'merged.epub', open_download_index(config))
+        else:
+            output = utils.merge_series(series_dir, 'merged.txt', open_download_index(config))
+        chapters = len(utils.get_downloaded_novels(series_dir)) if output else 0
+    elif options['async']:
+        import asyncio
+        from pixiv_crawler.async_crawler import AsyncPixivNovelCrawler
+
+        async def crawl():
+            async with AsyncPixivNovelCrawler(config) as crawler:
+                if scenario == 'series':
+                    await crawler.crawl_novel(str(FIRST_ID))
+                    return options['chapters']
+                results = await crawler.download_novels(
+                    [str(FIRST_ID + i) for i in range(options['singles'])], config['DOWNLOAD_PATH'])
+                return sum(results.values())
+        chapters = asyncio.run(crawl())
+    else:
+        from pixiv_crawler.crawler import PixivNovelCrawler
+        crawler = PixivNovelCrawler(config)
+        if scenario == 'series':
+            crawler.crawl_novel(str(FIRST_ID))
+            chapters = options['chapters']
+        else:
+            chapters = sum(crawler.download_novel(str(FIRST_ID + i), config['DOWNLOAD_PATH'])
+                           for i in range(options['singles']))
+    queue.put((chapters, time.perf_counter() - start, peak_rss_mb()))
+
+
+def measure(scenario: str, config: dict, options: dict, server: StubServer) -> dict:
+    """在子进程中运行场景，返回统计结果"""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    server.reset_counts()
+    process = ctx.Process(target=run_scenario, args=(scenario, config, options, queue))
+    process.start()
+    chapters, seconds, rss = queue.get()
+    process.join()
+
+    counts = server.counts()
+    requests = sum(n for kind, n in counts.items() if kind in ('novel', 'series', 'show'))
+    return {
+        'scenario': scenario,
+        'chapters': chapters,
+        'seconds': round(seconds, 3),
+        'chapters_per_sec': round(chapters / seconds, 1) if seconds else 0,
+        'requests': requests,
+        'requests_per_chapter': round(requests / chapters, 2) if chapters else 0,
+        'throttled': counts.get('429', 0),
+        'failed': counts.get('500', 0),
+        'peak_rss_mb': round(rss, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='离线爬取基准测试')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help='要运行的场景，可重复指定，默认全部')
+    parser.add_argument('--chapters', type=int, default=600, help='series 场景的章节数')
+    parser.add_argument('--singles', type=int, default=50, help='single 场景下载的篇数')
+    parser.add_argument('--content-size', type=int, default=5000, help='每章正文字符数')
+    parser.add_argument('--workers', type=int, default=4, help='MAX_WORKERS')
+    parser.add_argument('--rate', type=float, default=1000, help='RATE_LIMIT（次/秒）')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的附加延迟（秒）')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='返回 429 的概率')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='返回 500 的概率')
+    parser.add_argument('--content-source', choices=('auto', 'html'), default='auto', help='CONTENT_SOURCE')
+    parser.add_argument('--storage', choices=('txt', 'gzip', 'zstd'), default='txt', help='STORAGE_FORMAT')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='使用 AsyncPixivNovelCrawler')
+    parser.add_argument('--fixtures', help='录制数据目录，结构见 stub_server.py')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    scenarios = args.scenario or list(SCENARIOS)
+    options = {'async': args.use_async, 'chapters': args.chapters, 'singles': args.singles}
+    results = []
+    with tempfile.TemporaryDirectory() as tmp, \
+            StubServer(series_size=max(args.chapters, args.singles), content_size=args.content_size,
+                       latency=args.latency, rate_429=args.rate_429, fail_rate=args.fail_rate,
+                       fixtures=args.fixtures) as server:
+        for scenario in scenarios:
+            download_path = os.path.join(tmp, 'single' if scenario == 'single' else 'series')
+            config = make_config(args, server.url, download_path)
+            if scenario in ('merge', 'epub') and 'series' not in scenarios:
+                # merge、epub 需要先下载系列，这一步不计入结果
+                measure('series', config, options, server)
+            results.append(measure(scenario, config, options, server))
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'场景':<8}{'章节':>8}{'耗时(s)':>10}{'章节/秒':>10}{'请求/章':>10}"
+          f"{'429':>6}{'500':>6}{'峰值内存(MB)':>14}")
+    for r in results:
+        print(f"{r['scenario']:<8}{r['chapters']:>8}{r['seconds']:>10.2f}{r['chapters_per_sec']:>10.1f}"
+              f"{r['requests_per_chapter']:>10.2f}{r['throttled']:>6}{r['failed']:>6}{r['peak_rss_mb']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""pixiv 标记转换基准测试
+
+测量合并（markup.RenderedReader）和 EPUB（epub.render_line）转换多 MB 正文中
+pixiv 标记的耗时，并与不处理标记的基线对比：合并的基线是直接分块复制正文，
+EPUB 的基线是逐行转义。
+同时给出纯文本正文（不含标记时走快速路径）和带标记正文两种情况。
+
+用法:
+    python benchmarks/bench_markup.py                 # 使用生成的正文
+    python benchmarks/bench_markup.py novel1.txt ...  # 使用保存的章节文件
+"""
+
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from pixiv_crawler.epub import escape, render_line
+from pixiv_crawler.markup import RenderedReader
+from pixiv_crawler.utils import copy_stripped
+
+
+def make_content(size: int, markup: bool) -> str:
+    """生成约 size 个字符的正文
+
+    markup 为 True 时每 20 段含 4 处注音，并有一次换页、小标题和插图，
+    与带注音的长篇小说密度相近。
+    """
+    paragraph = "她抬头望向夜空，「今晚的月色真美」，然后轻轻地笑了。\n"
+    block = paragraph * 20
+    if markup:
+        ruby = "她抬头望向[[rb:夜空 > よぞら]]，「今晚的[[rb:月色 > つきいろ]]真美」，然后轻轻地笑了。\n"
+        block = ruby * 2 + paragraph * 18 + "[newpage]\n[chapter:第二节]\n[pixivimage:12345678-1]\n"
+    return block * (size // len(block) + 1)
+
+
+def merge_copy(content: str, render: bool) -> None:
+    """按合并时的方式分块复制正文，render 为 True 时同时转换标记"""
+    src = io.StringIO(content)
+    copy_stripped(RenderedReader(src) if render else src, io.StringIO())
+
+
+def escape_lines(content: str) -> str:
+    """EPUB 基线：逐行转义，不处理标记"""
+    return ''.join(f'<p>{escape(line)}</p>\n' for line in content.split('\n'))
+
+
+def xhtml_lines(content: str) -> str:
+    return ''.join(render_line(line) for line in content.split('\n'))
+
+
+def timeit(func, content: str, repeat: int) -> float:
+    """返回多次运行中的最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    if len(sys.argv) > 1:
+        samples = []
+        for path in sys.argv[1:]:
+            with open(path, 'r', encoding='utf-8') as f:
+                samples.append((os.path.basename(path), f.read()))
+    else:
+        samples = [(f"{'标记' if markup else '纯文本'} {size // 1_000_000}M 字", make_content(size, markup))
+                   for size in (1_000_000, 4_000_000) for markup in (False, True)]
+
+    print(f"{'正文':<16}{'大小(MB)':>10}{'复制(ms)':>12}{'合并(ms)':>12}"
+          f"{'转义(ms)':>12}{'XHTML(ms)':>12}{'每MB增加(ms)':>16}")
+    for name, content in samples:
+        repeat = 3 if len(content) > 2_000_000 else 5
+        size_mb = len(content.encode('utf-8')) / (1024 * 1024)
+        copy_time = timeit(lambda c: merge_copy(c, False), content, repeat)
+        merge_time = timeit(lambda c: merge_copy(c, True), content, repeat)
+        escape_time = timeit(escape_lines, content, repeat)
+        xhtml_time = timeit(xhtml_lines, content, repeat)
+        overhead = max(merge_time - copy_time, xhtml_time - escape_time) / size_mb
+        print(f"{name:<16}{size_mb:>10.1f}{copy_time * 1000:>12.2f}{merge_time * 1000:>12.2f}"
+              f"{escape_time * 1000:>12.2f}{xhtml_time * 1000:>12.2f}{overhead * 1000:>16.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""预加载数据提取基准测试
+
+对比定向扫描（preload.extract_preload_data）与构建完整 BeautifulSoup
+树两种方式从 show.php 页面中提取正文的耗时。
+
+用法:
+    python benchmarks/bench_preload.py                 # 使用生成的样例页面
+    python benchmarks/bench_preload.py page1.html ...  # 使用保存的页面
+"""
+
+import html
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from bs4 import BeautifulSoup
+
+from pixiv_crawler.preload import extract_preload_data
+
+
+def make_page(novel_id: str, size: int) -> str:
+    """生成与 show.php 结构相近的页面，正文约 size 个字符"""
+    paragraph = "这是一段用于基准测试的小说正文，包含「引号」与<符号>&实体。\n"
+    content = paragraph * (size // len(paragraph) + 1)
+    preload = {'novel': {novel_id: {'id': novel_id, 'title': '测试', 'content': content}}}
+    head = ''.join(f'<meta name="m{i}" content="{i}">\n<script>var a{i} = "{"x" * 200}";</script>\n'
+                   for i in range(200))
+    body = ''.join(f'<div class="c{i}"><span>{i}</span></div>\n' for i in range(2000))
+    return (f'<!DOCTYPE html><html><head>{head}'
+            f'<meta name="preload-data" id="meta-preload-data" content="{html.escape(json.dumps(preload), quote=True)}">'
+            f'</head><body>{body}</body></html>')
+
+
+def soup_extract(page: str):
+    """基线：完整构建 BeautifulSoup 树"""
+    tag = BeautifulSoup(page, 'html.parser').find('meta', {'id': 'meta-preload-data'})
+    return json.loads(tag.get('content'))
+
+
+def timeit(func, page: str, repeat: int) -> float:
+    """返回多次运行中的最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(page)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    if len(sys.argv) > 1:
+        pages = []
+        for path in sys.argv[1:]:
+            with open(path, 'r', encoding='utf-8') as f:
+                pages.append((os.path.basename(path), f.read()))
+    else:
+        pages = [(f"生成页面 {size // 1000}K 字", make_page('1', size))
+                 for size in (10_000, 100_000, 1_000_000)]
+
+    print(f"{'页面':<20}{'大小(KB)':>10}{'BeautifulSoup(ms)':>20}{'定向扫描(ms)':>16}{'加速比':>10}")
+    for name, page in pages:
+        assert extract_preload_data(page) == soup_extract(page)
+        repeat = 3 if len(page) > 1_000_000 else 10
+        soup_time = timeit(soup_extract, page, repeat)
+        scan_time = timeit(extract_preload_data, page, repeat)
+        print(f"{name:<20}{len(page.encode('utf-8')) // 1024:>10}{soup_time * 1000:>20.2f}"
+              f"{scan_time * 1000:>16.2f}{soup_time / scan_time:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
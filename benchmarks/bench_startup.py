@@ -0,0 +1,86 @@
+"""启动耗时基准测试
+
+在独立的子进程中测量导入各模块的耗时（取多次运行的中位数），并检查导入
+pixiv_crawler.main 后没有提前加载网络与解析库。超出 --budget 或提前加载了
+这些库时以非零退出码结束，可用于防止启动变慢。
+
+用法:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20 --budget 80
+    python benchmarks/bench_startup.py --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# 启动时测量的模块，第一项为基线
+MODULES = ('pixiv_crawler', 'pixiv_crawler.crawler', 'pixiv_crawler.main')
+
+# 导入 pixiv_crawler.main 后不应加载的第三方库，只在第一次请求或解析时导入
+LAZY_MODULES = ('requests', 'urllib3', 'bs4', 'lxml', 'tqdm', 'aiohttp')
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'ms': elapsed * 1000, 'loaded': [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def probe(module: str) -> dict:
+    """在新的解释器中导入模块，返回耗时（毫秒）和已加载的第三方库"""
+    env = dict(os.environ, PYTHONPATH=SRC_DIR + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    output = subprocess.run(
+        [sys.executable, '-c', _PROBE.format(module=module, lazy=LAZY_MODULES)],
+        env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def measure(module: str, runs: int) -> dict:
+    """多次导入，返回耗时中位数与最小值"""
+    samples = [probe(module) for _ in range(runs)]
+    times = [sample['ms'] for sample in samples]
+    return {
+        'module': module,
+        'median_ms': round(statistics.median(times), 1),
+        'min_ms': round(min(times), 1),
+        'loaded': samples[-1]['loaded'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='启动耗时基准测试')
+    parser.add_argument('--runs', type=int, default=10, help='每个模块的导入次数')
+    parser.add_argument('--budget', type=float, help='导入 pixiv_crawler.main 的耗时上限（毫秒，按中位数）')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    results = [measure(module, args.runs) for module in MODULES]
+    main_result = results[-1]
+    errors = []
+    if main_result['loaded']:
+        errors.append(f"导入 pixiv_crawler.main 时提前加载了: {', '.join(main_result['loaded'])}")
+    if args.budget is not None and main_result['median_ms'] > args.budget:
+        errors.append(f"导入 pixiv_crawler.main 耗时 {main_result['median_ms']} ms，超过上限 {args.budget} ms")
+
+    if args.json:
+        print(json.dumps({'results': results, 'errors': errors}, ensure_ascii=False, indent=2))
+    else:
+        print(f"{'模块':<26}{'中位数(ms)':>12}{'最小值(ms)':>12}  提前加载")
+        for r in results:
+            print(f"{r['module']:<26}{r['median_ms']:>12.1f}{r['min_ms']:>12.1f}  {', '.join(r['loaded']) or '-'}")
+        for error in errors:
+            print(error, file=sys.stderr)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""本地 Pixiv 模拟服务器
+
+在本机端口上提供 /ajax/novel/{id}、/ajax/novel/series/{id} 和 /novel/show.php，
+配合配置项 BASE_URL 使用，可以在没有网络的情况下运行爬虫。支持注入延迟、
+429 限流和 5xx 失败，并统计各类请求的次数。
+
+数据来源：
+    - 指定 fixtures 目录时优先使用录制的响应：
+        fixtures/novel/{id}.json    /ajax/novel/{id} 的完整响应
+        fixtures/series/{id}.json   /ajax/novel/series/{id} 的响应，page.series 为全部章节，由服务器分页
+        fixtures/show/{id}.html     /novel/show.php?id={id} 的页面
+    - 没有录制数据时按 series_size、content_size 生成系列 SERIES_ID 及其章节，
+      章节ID从 FIRST_ID 开始连续编号。
+
+用法::
+
+    with StubServer(series_size=600, latency=0.01, rate_429=0.02) as server:
+        config['BASE_URL'] = server.url
+        ...
+        print(server.counts())
+"""
+
+import html
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+SERIES_ID = '1'
+FIRST_ID = 10001
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    """客户端关闭 keep-alive 连接时不输出异常，保持基准测试的输出可读"""
+
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+_NOVEL_PATH = re.compile(r'^/ajax/novel/(\d+)$')
+_SERIES_PATH = re.compile(r'^/ajax/novel/series/(\d+)$')
+
+
+class StubServer:
+    """模拟服务器，运行在后台线程中"""
+
+    def __init__(self, series_size: int = 10, content_size: int = 5000, latency: float = 0.0,
+                 rate_429: float = 0.0, fail_rate: float = 0.0, retry_after: float = 0,
+                 fixtures: Optional[str] = None, seed: int = 0):
+        """
+        Args:
+            series_size: 生成的系列章节数
+            content_size: 生成的每章正文字符数
+            latency: 每个请求的附加延迟（秒）
+            rate_429: 返回 429 的概率
+            fail_rate: 返回 500 的概率
+            retry_after: 429 响应的 Retry-After（秒）
+            fixtures: 录制数据目录
+            seed: 随机种子，保证注入的错误可复现
+        """
+        self.series_size = series_size
+        self.content_size = content_size
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.fail_rate = fail_rate
+        self.retry_after = retry_after
+        self.fixtures = fixtures
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StubServer':
+        """在随机端口上启动服务器"""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # 响应头和响应体分两次写出，关闭 Nagle 避免与延迟确认叠加出 40ms 的停顿
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                status, content_type, body, headers = stub.handle(self.path)
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = _QuietHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """关闭服务器"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'StubServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def counts(self) -> Dict[str, int]:
+        """各类请求及注入错误的次数"""
+        with self._lock:
+            return dict(self._counts)
+
+    def reset_counts(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] += 1
+
+    def _inject(self) -> Optional[int]:
+        """按概率返回需要注入的错误状态码"""
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.rate_429:
+            return 429
+        if roll < self.rate_429 + self.fail_rate:
+            return 500
+        return None
+
+    def handle(self, path: str):
+        """处理一个请求，返回 (状态码, Content-Type, 响应体, 附加响应头)"""
+        if self.latency:
+            time.sleep(self.latency)
+        url = urlparse(path)
+        query = parse_qs(url.query)
+
+        if _NOVEL_PATH.match(url.path):
+            kind = 'novel'
+        elif _SERIES_PATH.match(url.path):
+            kind = 'series'
+        elif url.path == '/novel/show.php':
+            kind = 'show'
+        else:
+            return 404, 'application/json', b'{}', {}
+        self._count(kind)
+
+        injected = self._inject()
+        if injected:
+            self._count(str(injected))
+            headers = {'Retry-After': str(self.retry_after)} if injected == 429 else {}
+            return injected, 'application/json', b'{"error":true}', headers
+
+        if kind == 'novel':
+            data = self.novel(_NOVEL_PATH.match(url.path).group(1))
+        elif kind == 'series':
+            data = self.series_page(_SERIES_PATH.match(url.path).group(1),
+                                    int(query.get('last_order', ['0'])[0]),
+                                    int(query.get('limit', ['30'])[0]))
+        else:
+            page = self.show_page(query.get('id', [''])[0])
+            if page is None:
+                return 404, 'text/html', b'', {}
+            return 200, 'text/html; charset=utf-8', page.encode('utf-8'), {}
+        if data is None:
+            return 404, 'application/json', b'{"error":true,"body":[]}', {}
+        return 200, 'application/json', json.dumps(data, ensure_ascii=False).encode('utf-8'), {}
+
+    def _fixture(self, *parts: str) -> Optional[str]:
+        if not self.fixtures:
+            return None
+        path = os.path.join(self.fixtures, *parts)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def _order(self, novel_id: str) -> Optional[int]:
+        """生成数据中章节的序号，不存在时返回 None"""
+        order = int(novel_id) - FIRST_ID + 1
+        return order if 1 <= order <= self.series_size else None
+
+    def novel(self, novel_id: str) -> Optional[Dict]:
+        recorded = self._fixture('novel', f'{novel_id}.json')
+        if recorded is not None:
+            return json.loads(recorded)
+        order = self._order(novel_id)
+        if order is None:
+            return None
+        paragraph = f"第{order}章的正文，用于离线基准测试。\n"
+        return {'error': False, 'body': {
+            'id': novel_id,
+            'title': f'第{order}章',
+            'userName': '测试作者',
+            'createDate': '2024-01-01T00:00:00+09:00',
+            'tags': {'tags': [{'tag': '基准测试'}]},
+            'content': paragraph * (self.content_size // len(paragraph) + 1),
+            'seriesNavData': {'seriesId': int(SERIES_ID), 'title': '基准测试系列', 'order': order},
+        }}
+
+    def series_page(self, series_id: str, last_order: int, limit: int) -> Optional[Dict]:
+        recorded = self._fixture('series', f'{series_id}.json')
+        if recorded is not None:
+            data = json.loads(recorded)
+            chapters = data['body']['page']['series']
+            data['body'].setdefault('total', len(chapters))
+            data['body']['page']['series'] = chapters[last_order:last_order + limit]
+            return data
+        if series_id != SERIES_ID:
+            return None
+        chapters = [{'id': str(FIRST_ID + i), 'order': i + 1}
+                    for i in range(last_order, min(last_order + limit, self.series_size))]
+        return {'error': False, 'body': {'total': self.series_size, 'page': {'series': chapters}}}
+
+    def show_page(self, novel_id: str) -> Optional[str]:
+        recorded = self._fixture('show', f'{novel_id}.html')
+        if recorded is not None:
+            return recorded
+        novel = self.novel(novel_id)
+        if novel is None:
+            return None
+        preload = {'novel': {novel_id: novel['body']}}
+        return ('<!DOCTYPE html><html><head>'
+                f'<meta name="preload-data" id="meta-preload-data" '
+                f'content="{html.escape(json.dumps(preload, ensure_ascii=False), quote=True)}">'
+                '</head><body></body></html>')
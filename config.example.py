@@ -1,18 +1,80 @@
 # Pixiv Cookie，登录后从浏览器获取
 COOKIE = ''
 
+# 其他账号的 Cookie（可选），与 COOKIE 一起组成账号池，请求分配给负载最低的账号
+COOKIES = []
+
 # 下载目录
 DOWNLOAD_PATH = 'novels'
 
-# 请求间隔（秒）
+# 请求间隔（秒），未设置 RATE_LIMIT 时用于推算请求速率
 SLEEP_TIME = 1
 
+# 每个账号的请求速率（次/秒），使用该账号的所有下载线程共享
+RATE_LIMIT = 1
+
+# 允许的突发请求数
+RATE_BURST = 1
+
+# 并发下载线程数
+MAX_WORKERS = 1
+
 # 重试次数
 MAX_RETRIES = 3
 
-# 重试延迟（秒）
+# 重试延迟（秒），实际等待时间为带随机抖动的指数退避；服务器返回 Retry-After 时以其为准
 RETRY_DELAY = 2
 
+# 单次重试的最长等待时间（秒）
+RETRY_MAX_DELAY = 60
+
+# 自适应限流：收到 429/5xx 时请求速率减半（不低于 RATE_LIMIT_MIN），
+# 请求成功后逐步恢复（不高于 RATE_LIMIT_MAX，默认为 RATE_LIMIT）
+RATE_LIMIT_MIN = 0.1
+# RATE_LIMIT_MAX = 2
+# 同一拥塞窗口（秒）内的多次失败只降低一次速率
+RATE_DECREASE_WINDOW = 2
+
+# 连接超时与读取超时（秒）
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 30
+
+# 正文来源：auto 优先使用接口返回的正文，html 总是解析小说页面
+CONTENT_SOURCE = 'auto'
+
+# 是否使用下载索引记录已下载的小说（首次启用时自动从已有文件回填）
+USE_INDEX = True
+
+# 耗时统计导出文件（可选），.prom 结尾为 Prometheus 文本格式，否则为 JSON
+METRICS_EXPORT = None
+
+# 是否在下载时更新全文索引（需要 SQLite 3.34 以上），已有下载可用 reindex 建立索引
+SEARCH_INDEX = False
+
+# merge-all 使用的进程数，None 表示 CPU 核数
+MERGE_WORKERS = None
+
+# 是否记录下载任务日志，进程中断后可用 resume 继续
+USE_JOURNAL = True
+
+# 系列目录每页请求的章节数
+SERIES_PAGE_SIZE = 500
+
+# 系列目录缓存有效期（秒），0 表示不缓存
+SERIES_CACHE_TTL = 3600
+
+# 是否启用 HTTP 响应缓存（ETag / Last-Modified 条件请求）
+HTTP_CACHE = False
+
+# 响应缓存目录，默认为下载目录中的 .http_cache
+HTTP_CACHE_DIR = ''
+
+# 响应缓存大小上限（MB），超出后淘汰最久未使用的响应
+HTTP_CACHE_MAX_MB = 512
+
+# 章节存储格式：txt（纯文本）、gzip（.txt.gz）、zstd（.txt.zst，需要安装 zstandard）
+STORAGE_FORMAT = 'txt'
+
 # 是否保存元数据
 SAVE_METADATA = True
 
@@ -0,0 +1,341 @@
+"""异步爬虫模块
+
+基于 asyncio 和 aiohttp 的 PixivNovelCrawler 异步版本，所有请求共用一个
+带连接池（HTTP/1.1 keep-alive）的客户端，适合在单进程内并发抓取大量小说。
+"""
+
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional, Union
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 为可选依赖
+    aiohttp = None
+
+from . import utils
+from .content import SOURCE_AJAX, SOURCE_HTML, SOURCE_MISSING, ContentSourceStats, extract_ajax_content, use_ajax_content
+from .crawler import DEFAULT_HEADERS
+from .index import open_download_index
+from .journal import open_job_journal
+from .metrics import (COUNTER_BYTES, COUNTER_REQUESTS, COUNTER_RETRIES, STAGE_JSON, STAGE_PARSE,
+                      STAGE_REQUEST, STAGE_SAVE, CrawlMetrics, report_metrics)
+from .parser import build_novel_info, extract_page_content, parse_cookie, parse_series_nav, parse_series_page
+from .ratelimit import RateLimiter
+from .search import open_search_index
+from .series import async_list_series_chapters, open_series_cache, series_page_url
+from .sessions import load_cookies
+from .storage import get_storage
+from .throttle import OK, RETRYABLE, ThrottleController, classify
+
+class AsyncPixivNovelCrawler:
+    """Pixiv小说异步爬虫类
+
+    用法::
+
+        async with AsyncPixivNovelCrawler(config) as crawler:
+            await crawler.crawl_novel(novel_id)
+    """
+
+    def __init__(self, config: Dict):
+        """初始化爬虫
+
+        Args:
+            config: 配置字典，包含必要的设置项
+        """
+        if aiohttp is None:
+            raise ImportError("异步爬虫需要安装 aiohttp：pip install aiohttp")
+
+        self.config = config
+        cookies = load_cookies(config)
+        if not cookies:
+            logging.error("请先设置 COOKIE！")
+            raise ValueError("Cookie设置失败")
+        try:
+            # 异步爬虫只使用第一个账号
+            self.cookies = parse_cookie(cookies[0])
+        except Exception as e:
+            logging.error(f"Cookie 设置失败: {str(e)}")
+            raise ValueError("Cookie设置失败")
+
+        self.base_url = config.get('BASE_URL', "https://www.pixiv.net").rstrip('/')
+        self.max_workers = max(1, int(config.get('MAX_WORKERS', 1)))
+        self.rate_limiter = RateLimiter.from_config(config)
+        self.throttle = ThrottleController(self.rate_limiter, config)
+        self.content_stats = ContentSourceStats()
+        self.metrics = CrawlMetrics()
+        self.index = open_download_index(config)
+        self.storage = get_storage(config)
+        self.search_index = open_search_index(config)
+        self.journal = open_job_journal(config)
+        self.series_cache = open_series_cache(config)
+        self.series_page_size = config.get('SERIES_PAGE_SIZE', 500)
+        self._session = None
+
+    async def __aenter__(self) -> 'AsyncPixivNovelCrawler':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        """获取共享的 HTTP 客户端，首次调用时创建"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_workers,
+                limit_per_host=self.max_workers,
+                keepalive_timeout=self.config.get('KEEPALIVE_TIMEOUT', 30)
+            )
+            timeout = aiohttp.ClientTimeout(
+                connect=self.config.get('CONNECT_TIMEOUT', 10),
+                sock_read=self.config.get('READ_TIMEOUT', 30)
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=timeout,
+                headers=DEFAULT_HEADERS,
+                cookies=self.cookies
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """关闭 HTTP 客户端及其连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def make_request(self, url: str) -> Optional[str]:
+        """发送请求并处理重试，返回响应文本
+
+        重试与限流策略与 PixivNovelCrawler.make_request 相同。
+        """
+        max_retries = self.config.get('MAX_RETRIES', 3)
+        session = self._get_session()
+
+        for i in range(max_retries):
+            delay = self.throttle.pause_remaining() + self.rate_limiter.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            status = None
+            headers = None
+            self.metrics.count(COUNTER_REQUESTS)
+            try:
+                with self.metrics.timer(STAGE_REQUEST):
+                    async with session.get(url) as response:
+                        status = response.status
+                        headers = response.headers
+                        if classify(status) == OK:
+                            body = await response.read()
+                            text = await response.text()
+                            self.metrics.count(COUNTER_BYTES, len(body))
+                            self.throttle.on_success()
+                            return text
+                        response.raise_for_status()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                kind = classify(status)
+                if kind not in RETRYABLE:
+                    logging.warning(f"请求失败，不再重试: {str(e)}")
+                    raise
+                logging.warning(f"请求失败 (尝试 {i+1}/{max_retries}): {str(e)}")
+                if i == max_retries - 1:
+                    raise
+                self.metrics.count(COUNTER_RETRIES)
+                await asyncio.sleep(self.throttle.on_failure(kind, i, headers))
+        return None
+
+    async def get_novel_info(self, novel_id: Union[str, int]) -> Optional[Dict]:
+        """获取小说信息"""
+        try:
+            ajax_url = f"{self.base_url}/ajax/novel/{novel_id}"
+            logging.info(f"正在获取小说信息: {ajax_url}")
+
+            text = await self.make_request(ajax_url)
+            if not text:
+                return None
+
+            with self.metrics.timer(STAGE_JSON):
+                novel_data = json.loads(text)
+            if not novel_data.get('body'):
+                logging.error("无法获取小说信息，可能是未登录或Cookie已过期")
+                return None
+
+            novel = novel_data['body']
+            logging.info(f"成功获取小说信息: {novel['title']}")
+
+            # 优先使用接口返回的正文，没有时再请求页面
+            content = extract_ajax_content(novel) if use_ajax_content(self.config) else ""
+            if content:
+                self.content_stats.record(SOURCE_AJAX)
+            else:
+                page_url = f"{self.base_url}/novel/show.php?id={novel_id}"
+                page = await self.make_request(page_url)
+                if not page:
+                    return None
+
+                with self.metrics.timer(STAGE_PARSE):
+                    content = extract_page_content(page, novel_id)
+                if not content:
+                    self.content_stats.record(SOURCE_MISSING)
+                    logging.error("无法获取小说内容")
+                    return None
+                self.content_stats.record(SOURCE_HTML)
+
+            logging.info("成功获取小说正文")
+            return build_novel_info(novel_id, novel, content)
+
+        except Exception as e:
+            logging.error(f"获取小说信息失败: {str(e)}")
+            return None
+
+    async def get_series_novels(self, series_id: Union[str, int]) -> List[str]:
+        """获取系列小说列表
+
+        Args:
+            series_id: 系列中任意一篇小说的ID
+        """
+        try:
+            ajax_url = f"{self.base_url}/ajax/novel/{series_id}"
+            logging.info(f"正在获取小说信息: {ajax_url}")
+
+            text = await self.make_request(ajax_url)
+            if not text:
+                return []
+
+            with self.metrics.timer(STAGE_JSON):
+                novel_data = json.loads(text)
+            if not novel_data.get('body'):
+                logging.error("无法获取小说信息")
+                return []
+
+            series_nav = novel_data['body'].get('seriesNavData')
+            if not series_nav:
+                logging.info("不是系列作品")
+                return []
+
+            return await self.list_series_novels(series_nav.get('seriesId'), series_nav, novel_data['body']['id'])
+
+        except Exception as e:
+            logging.error(f"获取系列小说列表失败: {str(e)}")
+            return []
+
+    async def list_series_novels(self, series_id: Union[str, int], series_nav: Optional[Dict] = None,
+                                 current_id: Optional[Union[str, int]] = None) -> List[str]:
+        """根据系列ID获取系列所有章节ID"""
+        try:
+            series_id = str(series_id or '')
+            if not series_id:
+                logging.error("无法获取系列ID")
+                return []
+
+            novels = [chapter['id'] for chapter in await self.list_series_chapters(series_id)]
+            if not novels and series_nav:
+                logging.info("从系列API获取失败，使用导航数据...")
+                novels = parse_series_nav(series_nav, current_id)
+
+            logging.info(f"找到 {len(novels)} 篇系列小说")
+            return novels
+
+        except Exception as e:
+            logging.error(f"获取系列小说列表失败: {str(e)}")
+            return []
+
+    async def _fetch_series_page(self, series_id: str, last_order: int):
+        text = await self.make_request(series_page_url(self.base_url, series_id, last_order, self.series_page_size))
+        with self.metrics.timer(STAGE_JSON):
+            data = json.loads(text) if text else {}
+        return parse_series_page(data, last_order)
+
+    async def list_series_chapters(self, series_id: str, refresh: bool = False,
+                                   revalidate: bool = False) -> List[Dict]:
+        """分页获取系列全部章节，参数见 series.list_series_chapters"""
+        return await async_list_series_chapters(self._fetch_series_page, series_id, self.series_cache,
+                                                refresh, revalidate)
+
+    async def download_novel(self, novel_id: Union[str, int], output_dir: str) -> bool:
+        """下载单篇小说到指定目录，不处理系列中的其他章节"""
+        novel_info = await self.get_novel_info(novel_id)
+        if not novel_info:
+            return False
+        return await self.save_novel_in_executor(novel_info, output_dir) is not None
+
+    async def save_novel_in_executor(self, novel_info: Dict, output_dir: str) -> Optional[str]:
+        """在线程池中保存小说，写文件、fsync 和写索引不阻塞事件循环"""
+        return await asyncio.get_running_loop().run_in_executor(None, self.save_novel, novel_info, output_dir)
+
+    def save_novel(self, novel_info: Dict, output_dir: str) -> Optional[str]:
+        """按当前存储格式保存小说并记录到下载索引，返回文件路径"""
+        with self.metrics.timer(STAGE_SAVE):
+            return utils.save_novel(novel_info, output_dir, self.index, self.storage, self.search_index)
+
+    async def download_novels(self, novel_ids: List[str], output_dir: str) -> Dict[str, bool]:
+        """并发下载小说，同时进行的下载数不超过 MAX_WORKERS
+
+        任务记录在任务日志中，与 PixivNovelCrawler.download_tasks 共用同一份日志。
+        """
+        semaphore = asyncio.Semaphore(self.max_workers)
+        journal = self.journal
+        if journal is not None and novel_ids:
+            journal.enqueue([(novel_id, output_dir) for novel_id in novel_ids])
+
+        async def worker(novel_id: str) -> bool:
+            async with semaphore:
+                if journal is not None:
+                    journal.start(novel_id)
+                try:
+                    ok = await self.download_novel(novel_id, output_dir)
+                except Exception as e:
+                    logging.error(f"下载小说 {novel_id} 失败: {str(e)}")
+                    if journal is not None:
+                        journal.finish(novel_id, False, str(e))
+                    return False
+                if journal is not None:
+                    journal.finish(novel_id, ok, None if ok else "获取或保存失败")
+                return ok
+
+        results = await asyncio.gather(*(worker(novel_id) for novel_id in novel_ids))
+        return dict(zip(novel_ids, results))
+
+    async def crawl_novel(self, novel_id: Union[str, int]) -> bool:
+        """爬取小说，系列作品会下载系列中所有未下载的章节，结束时输出耗时统计"""
+        self.metrics.reset()
+        try:
+            logging.info(f"\n开始爬取小说 ID: {novel_id}")
+            novel_info = await self.get_novel_info(novel_id)
+            if not novel_info:
+                return False
+
+            series_dir = utils.get_novel_dir(novel_info, self.config['DOWNLOAD_PATH'])
+            await self.save_novel_in_executor(novel_info, series_dir)
+
+            if not novel_info['series_info']:
+                return True
+
+            series_info = novel_info['series_info']
+            series_novels = await self.list_series_novels(series_info['id'], series_info.get('nav'), novel_info['id'])
+            if not series_novels:
+                return True
+
+            downloaded_novels = utils.get_downloaded_novels(series_dir, self.index)
+            downloaded_novels.add(str(novel_info['id']))
+            novels_to_download = [nid for nid in series_novels if nid not in downloaded_novels]
+
+            if novels_to_download:
+                logging.info(f"发现 {len(novels_to_download)} 篇未下载的小说")
+                results = await self.download_novels(novels_to_download, series_dir)
+                failed = [nid for nid, ok in results.items() if not ok]
+                if failed:
+                    logging.warning(f"{len(failed)} 篇小说下载失败: {', '.join(failed)}")
+                    return True
+            else:
+                logging.info("系列中的所有小说都已下载完成")
+
+            utils.mark_series_completed(series_dir)
+            return True
+
+        except Exception as e:
+            logging.error(f"爬取失败: {str(e)}")
+            return False
+        finally:
+            logging.info(f"正文来源: {self.content_stats.summary()}")
+            report_metrics(self.metrics, self.config)
@@ -0,0 +1,147 @@
+"""批量下载模块
+
+一次处理多个下载目标（小说ID、小说链接、系列链接）：去重后按系列分组，
+每个系列只解析一次章节列表，所有待下载章节进入同一个并发下载队列。
+"""
+
+import logging
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import utils
+from .parser import parse_target
+
+# 单篇结果
+RESULT_OK = 'ok'
+RESULT_FAILED = 'failed'
+
+# 系列错误
+SERIES_LISTING_FAILED = 'series listing failed'
+
+
+def read_targets(args: Iterable[str], files: Iterable[str] = ()) -> List[str]:
+    """收集命令行参数和文件中的下载目标
+
+    文件中每行一个目标，文件名为 - 时读取标准输入；空行和以 # 开头的行会被忽略。
+    """
+    targets = list(args)
+    for path in files:
+        f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+        try:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    targets.append(line)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+    return targets
+
+
+def parse_targets(targets: Iterable[str]) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """解析并去重下载目标
+
+    Returns:
+        (按首次出现顺序去重的 (类型, ID) 列表, 无法识别的目标)
+    """
+    parsed = {}
+    invalid = []
+    for target in targets:
+        result = parse_target(target)
+        if result is None:
+            invalid.append(target)
+        else:
+            parsed.setdefault(result, None)
+    return list(parsed), invalid
+
+
+def run_batch(crawler, targets: List[Tuple[str, str]], with_series: bool = True) -> Dict:
+    """批量下载
+
+    Args:
+        crawler: PixivNovelCrawler 实例
+        targets: parse_targets 返回的 (类型, ID) 列表
+        with_series: 小说属于系列时是否下载整个系列
+
+    Returns:
+        结果字典：novels 为小说ID到结果的映射，series 为系列ID到章节统计的映射；
+        无法获取章节列表的系列带有 error，不会标记为已完成
+    """
+    download_path = crawler.config['DOWNLOAD_PATH']
+    novel_ids = [target_id for kind, target_id in targets if kind == 'novel']
+    series_ids = [target_id for kind, target_id in targets if kind == 'series']
+    novels = {}
+    series = {}
+    anchors = {}  # 系列ID -> 系列中已获取的一篇小说
+
+    def fetch(novel_id: str) -> Tuple[str, Optional[Dict]]:
+        try:
+            return novel_id, crawler.get_novel_info(novel_id)
+        except Exception as e:
+            logging.error(f"获取小说 {novel_id} 失败: {str(e)}")
+            return novel_id, None
+
+    def save(novel_info: Dict) -> bool:
+        output_dir = utils.get_novel_dir(novel_info, download_path)
+        return crawler.save_novel(novel_info, output_dir) is not None
+
+    # 系列链接：用系列的第一章作为锚点获取系列标题
+    for series_id in series_ids:
+        try:
+            chapters = crawler.series_enumerator.list_chapters(series_id)
+        except Exception as e:
+            logging.error(f"获取系列 {series_id} 失败: {str(e)}")
+            chapters = []
+        if not chapters:
+            logging.error(f"系列 {series_id} 没有可下载的章节")
+            series[series_id] = {'title': None, 'dir': None, 'queued': 0, 'failed': 0,
+                                 'error': SERIES_LISTING_FAILED}
+            continue
+        novel_ids.append(chapters[0]['id'])
+
+    # 并发获取所有指定的小说
+    novel_ids = list(dict.fromkeys(novel_ids))
+    with ThreadPoolExecutor(max_workers=crawler.max_workers) as executor:
+        fetched = list(executor.map(fetch, novel_ids))
+
+    for novel_id, novel_info in fetched:
+        if not novel_info:
+            novels[novel_id] = RESULT_FAILED
+            continue
+        novels[novel_id] = RESULT_OK if save(novel_info) else RESULT_FAILED
+        series_info = novel_info['series_info']
+        if series_info and novels[novel_id] == RESULT_OK:
+            anchors.setdefault(str(series_info['id']), novel_info)
+
+    # 每个系列只规划一次，剩余章节汇入同一个下载队列
+    tasks = []
+    for series_id, novel_info in anchors.items():
+        if not with_series and series_id not in series_ids:
+            continue
+        series_dir = utils.get_novel_dir(novel_info, download_path)
+        missing = crawler.plan_series_download(novel_info, series_dir)
+        series[series_id] = {'title': novel_info['series_info']['title'], 'dir': series_dir,
+                             'queued': len(missing or []), 'failed': 0}
+        if missing is None:
+            # 无法确定还缺哪些章节，不能当作已下载完整
+            logging.error(f"获取系列 {series_id} 的章节列表失败")
+            series[series_id]['error'] = SERIES_LISTING_FAILED
+            continue
+        tasks.extend((novel_id, series_dir) for novel_id in missing if novel_id not in novels)
+
+    logging.info(f"共 {len(anchors)} 个系列，{len(tasks)} 篇待下载章节")
+    results = crawler.download_tasks(tasks) if tasks else {}
+
+    for novel_id, ok in results.items():
+        novels[novel_id] = RESULT_OK if ok else RESULT_FAILED
+    failed_by_dir = Counter(series_dir for novel_id, series_dir in tasks if novels[novel_id] == RESULT_FAILED)
+    for info in series.values():
+        if info.get('error'):
+            continue
+        info['failed'] = failed_by_dir[info['dir']]
+        if info['failed'] == 0:
+            utils.mark_series_completed(info['dir'])
+
+    return {'novels': novels, 'series': series}
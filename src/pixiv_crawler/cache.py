@@ -0,0 +1,225 @@
+"""HTTP 响应缓存模块
+
+按 URL 在磁盘上缓存带 ETag / Last-Modified 的响应，再次请求时发送
+If-None-Match / If-Modified-Since 条件请求，服务器返回 304 时直接使用
+缓存内容。缓存总大小超过上限时按最近最少使用（LRU）淘汰。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional
+
+if TYPE_CHECKING:
+    import requests
+
+# 统计项
+STAT_HIT = 'hit'                # 304，使用缓存
+STAT_MISS = 'miss'              # 没有缓存
+STAT_REVALIDATE = 'revalidate'  # 发送了条件请求
+STAT_STORE = 'store'            # 写入缓存
+STAT_EVICT = 'evict'            # 淘汰缓存
+
+
+class ResponseCache:
+    """磁盘响应缓存
+
+    每个 URL 对应 ``{key}.body`` 和 ``{key}.json`` 两个文件，
+    LRU 顺序以元数据文件的修改时间保存，重启后依然有效。
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存正文总大小上限（字节）
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+        self._stats = Counter()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        """扫描缓存目录，按最近访问时间恢复 LRU 顺序
+
+        元数据损坏或缺少字段的条目（例如写入中途崩溃留下的）连同正文一起删除。
+        """
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.json'):
+                continue
+            key = filename[:-5]
+            path = os.path.join(self.cache_dir, filename)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            except ValueError:
+                meta = None
+            if not self._valid_meta(meta):
+                logging.warning(f"删除损坏的响应缓存: {filename}")
+                self._remove_files(key)
+                continue
+            entries.append((mtime, key, meta))
+        for _, key, meta in sorted(entries, key=lambda e: e[0]):
+            self._entries[key] = meta
+            self._size += meta['size']
+
+    @staticmethod
+    def _valid_meta(meta) -> bool:
+        """检查元数据是否包含缓存所需的字段"""
+        return (isinstance(meta, dict) and isinstance(meta.get('size'), int) and meta['size'] >= 0
+                and isinstance(meta.get('headers', {}), dict))
+
+    def _remove_files(self, key: str) -> None:
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _write_replace(path: str, data: bytes) -> None:
+        """先写入临时文件再重命名，其他进程或下次启动不会读到写了一半的文件"""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.cache_dir, key)
+        return base + '.body', base + '.json'
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """查找缓存元数据，没有时记为未命中"""
+        key = self._key(url)
+        with self._lock:
+            meta = self._entries.get(key)
+            if meta is None:
+                self._stats[STAT_MISS] += 1
+                return None
+            self._entries.move_to_end(key)
+        return meta
+
+    def conditional_headers(self, meta: Dict) -> Dict[str, str]:
+        """构造条件请求头"""
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        if headers:
+            with self._lock:
+                self._stats[STAT_REVALIDATE] += 1
+        return headers
+
+    def build_response(self, url: str, meta: Dict) -> Optional['requests.Response']:
+        """服务器返回 304 时，用缓存内容构造响应"""
+        body_path, meta_path = self._paths(self._key(url))
+        try:
+            with open(body_path, 'rb') as f:
+                content = f.read()
+            os.utime(meta_path)  # 记录最近访问时间
+        except OSError:
+            return None
+
+        import requests
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = content
+        response.headers.update(meta.get('headers', {}))
+        response.encoding = meta.get('encoding')
+        with self._lock:
+            self._stats[STAT_HIT] += 1
+        return response
+
+    def store(self, url: str, response: 'requests.Response') -> None:
+        """缓存带校验信息的成功响应"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if response.status_code != 200 or not (etag or last_modified):
+            return
+
+        key = self._key(url)
+        body_path, meta_path = self._paths(key)
+        content = response.content
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': response.encoding,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() == 'content-type'},
+            'size': len(content)
+        }
+        try:
+            self._write_replace(body_path, content)
+            self._write_replace(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+        except OSError as e:
+            logging.warning(f"写入响应缓存失败: {str(e)}")
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._size -= old['size']
+            self._entries[key] = meta
+            self._size += meta['size']
+            self._stats[STAT_STORE] += 1
+            evicted = self._evict()
+
+        for old_key in evicted:
+            self._remove_files(old_key)
+
+    def _evict(self):
+        """淘汰最久未使用的条目直到不超过上限，返回被淘汰的键（需持有锁）"""
+        evicted = []
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            key, meta = self._entries.popitem(last=False)
+            self._size -= meta['size']
+            self._stats[STAT_EVICT] += 1
+            evicted.append(key)
+        return evicted
+
+    def stats(self) -> Dict[str, int]:
+        """返回缓存统计，包括条目数和总大小"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._size
+        return stats
+
+    def summary(self) -> str:
+        """返回便于日志输出的统计文本"""
+        stats = self.stats()
+        return (f"命中 {stats.get(STAT_HIT, 0)}，未命中 {stats.get(STAT_MISS, 0)}，"
+                f"条件请求 {stats.get(STAT_REVALIDATE, 0)}，写入 {stats.get(STAT_STORE, 0)}，"
+                f"淘汰 {stats.get(STAT_EVICT, 0)}，共 {stats['entries']} 条 {stats['bytes'] // 1024} KB")
+
+
+def open_response_cache(config: Dict) -> Optional[ResponseCache]:
+    """根据配置创建响应缓存，HTTP_CACHE 为 False 时返回 None"""
+    if not config.get('HTTP_CACHE', False):
+        return None
+    cache_dir = config.get('HTTP_CACHE_DIR') or os.path.join(config.get('DOWNLOAD_PATH', 'novels'), '.http_cache')
+    return ResponseCache(cache_dir, int(config.get('HTTP_CACHE_MAX_MB', 512) * 1024 * 1024))
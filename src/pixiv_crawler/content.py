@@ -0,0 +1,50 @@
+"""正文来源策略模块
+
+/ajax/novel/{id} 的响应通常已包含正文，此时无需再请求 show.php 页面；
+只有接口数据缺少正文时才回退到页面解析。
+"""
+
+import threading
+from collections import Counter
+from typing import Dict
+
+# 正文来源
+SOURCE_AJAX = 'ajax'
+SOURCE_HTML = 'html'
+SOURCE_MISSING = 'missing'
+
+
+def extract_ajax_content(novel: Dict) -> str:
+    """从 /ajax/novel/{id} 的 body 中提取正文，没有时返回空字符串"""
+    content = novel.get('content')
+    return content if isinstance(content, str) else ""
+
+
+def use_ajax_content(config: Dict) -> bool:
+    """CONTENT_SOURCE 设为 'html' 时强制解析页面，默认优先使用接口正文"""
+    return config.get('CONTENT_SOURCE', 'auto') != SOURCE_HTML
+
+
+class ContentSourceStats:
+    """统计正文来自哪个来源（线程安全）"""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, source: str) -> None:
+        """记录一次正文来源"""
+        with self._lock:
+            self._counts[source] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        """返回各来源的计数"""
+        with self._lock:
+            return dict(self._counts)
+
+    def summary(self) -> str:
+        """返回便于日志输出的统计文本"""
+        counts = self.snapshot()
+        return (f"接口正文 {counts.get(SOURCE_AJAX, 0)} 篇，"
+                f"页面解析 {counts.get(SOURCE_HTML, 0)} 篇，"
+                f"获取失败 {counts.get(SOURCE_MISSING, 0)} 篇")
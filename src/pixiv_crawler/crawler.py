@@ -2,15 +2,46 @@
 
 import os
 import time
-import json
 import logging
-from typing import Dict, List, Optional, Union
-
-import requests
-from bs4 import BeautifulSoup
-from tqdm import tqdm
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 
 from . import utils
+from .cache import open_response_cache
+from .content import SOURCE_AJAX, SOURCE_HTML, SOURCE_MISSING, ContentSourceStats, extract_ajax_content, use_ajax_content
+from .index import open_download_index
+from .journal import open_job_journal
+from .metrics import (COUNTER_BYTES, COUNTER_CACHE_HITS, COUNTER_REQUESTS, COUNTER_RETRIES,
+                      STAGE_JSON, STAGE_PARSE, STAGE_REQUEST, STAGE_SAVE, CrawlMetrics, report_metrics)
+from .parser import build_novel_info, extract_page_content, parse_series_nav
+from .search import open_search_index
+from .series import SeriesEnumerator, open_series_cache
+from .sessions import Account, SessionPool, check_cookies
+from .storage import get_storage
+from .throttle import NETWORK_ERROR, OK, RETRYABLE, classify
+
+if TYPE_CHECKING:
+    import requests
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Referer': 'https://www.pixiv.net/',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Cache-Control': 'max-age=0',
+    'dnt': '1',
+    'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+    'sec-ch-ua-mobile': '?0',
+    'sec-ch-ua-platform': '"Windows"',
+    'sec-fetch-dest': 'document',
+    'sec-fetch-mode': 'navigate',
+    'sec-fetch-site': 'none',
+    'sec-fetch-user': '?1',
+    'upgrade-insecure-requests': '1'
+}
 
 class PixivNovelCrawler:
     """Pixiv小说爬虫类"""
@@ -22,215 +53,257 @@ class PixivNovelCrawler:
             config: 配置字典，包含必要的设置项
         """
         self.config = config
-        self.session = requests.Session()
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Referer': 'https://www.pixiv.net/',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Cache-Control': 'max-age=0',
-            'dnt': '1',
-            'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
-            'sec-ch-ua-mobile': '?0',
-            'sec-ch-ua-platform': '"Windows"',
-            'sec-fetch-dest': 'document',
-            'sec-fetch-mode': 'navigate',
-            'sec-fetch-site': 'none',
-            'sec-fetch-user': '?1',
-            'upgrade-insecure-requests': '1'
-        }
-        self.session.headers.update(self.headers)
-        self.base_url = "https://www.pixiv.net"
+        self.headers = dict(DEFAULT_HEADERS)
+        self.base_url = config.get('BASE_URL', "https://www.pixiv.net").rstrip('/')
+        self.timeout = (config.get('CONNECT_TIMEOUT', 10), config.get('READ_TIMEOUT', 30))
+        
+        # 并发下载设置：连接池需容纳所有工作线程
+        self.max_workers = max(1, int(config.get('MAX_WORKERS', 1)))
+        
+        # 账号会话池：每个账号有独立的连接池、限速器和限流控制器，
+        # 在第一次请求时才创建，只做本地操作时不加载网络库
+        self._sessions = None
+        self._sessions_lock = threading.Lock()
+        
+        # 正文来源与各阶段耗时统计
+        self.content_stats = ContentSourceStats()
+        self.metrics = CrawlMetrics()
+        
+        # 下载索引与存储格式
+        self.index = open_download_index(config)
+        self.storage = get_storage(config)
+        self.search_index = open_search_index(config)
         
-        if not self.setup_session():
+        # 下载任务日志，用于中断后恢复
+        self.journal = open_job_journal(config)
+        
+        # HTTP 响应缓存（可选）
+        self.response_cache = open_response_cache(config)
+        
+        # 系列章节分页枚举，目录带缓存
+        self.series_enumerator = SeriesEnumerator(
+            self._fetch_json,
+            self.base_url,
+            page_size=config.get('SERIES_PAGE_SIZE', 500),
+            max_workers=self.max_workers,
+            cache=open_series_cache(config)
+        )
+        
+        try:
+            check_cookies(config)
+        except ValueError as e:
+            logging.error(str(e))
             raise ValueError("Cookie设置失败")
 
     def setup_session(self) -> bool:
-        """设置会话，添加必要的cookie"""
-        if not self.config.get('COOKIE'):
-            logging.error("请先设置 COOKIE！")
-            return False
-
+        """根据 COOKIE / COOKIES 创建账号会话池"""
         try:
-            for cookie_pair in self.config['COOKIE'].split(';'):
-                if not cookie_pair.strip():
-                    continue
-                name, value = cookie_pair.strip().split('=', 1)
-                self.session.cookies.set(name, value)
+            self._sessions = SessionPool.from_config(self.config, self.headers, max(10, self.max_workers))
+            if len(self._sessions.accounts) > 1:
+                logging.info(f"已加载 {len(self._sessions.accounts)} 个账号")
             return True
-        except Exception as e:
-            logging.error(f"Cookie 设置失败: {str(e)}")
+        except ValueError as e:
+            logging.error(str(e))
             return False
 
-    def make_request(self, url: str) -> Optional[requests.Response]:
-        """发送请求并处理重试"""
-        retry_delay = self.config.get('RETRY_DELAY', 2)
+    @property
+    def sessions(self) -> SessionPool:
+        """账号会话池，第一次使用时创建（线程安全）"""
+        if self._sessions is None:
+            with self._sessions_lock:
+                if self._sessions is None and not self.setup_session():
+                    raise ValueError("Cookie设置失败")
+        return self._sessions
+
+    @property
+    def session(self) -> 'requests.Session':
+        """第一个账号的会话"""
+        return self.sessions.accounts[0].session
+
+    def make_request(self, url: str, account: Optional[Account] = None) -> Optional['requests.Response']:
+        """发送请求并处理重试
+
+        429、5xx 和网络错误会重试，404 等客户端错误直接抛出；
+        重试等待时间优先遵循 Retry-After，并由账号的限流控制器调整该账号的速率。
+        启用响应缓存时先发送条件请求，服务器返回 304 则使用缓存内容。
+
+        Args:
+            url: 请求地址
+            account: 使用的账号，默认借用当前负载最低的账号
+        """
+        if account is None:
+            with self.sessions.lease() as account:
+                return self.make_request(url, account)
+        
+        import requests
+
         max_retries = self.config.get('MAX_RETRIES', 3)
         
+        cached = self.response_cache.lookup(url) if self.response_cache else None
+        headers = self.response_cache.conditional_headers(cached) if cached else None
+        
         for i in range(max_retries):
+            account.throttle.wait()
+            account.rate_limiter.acquire()
+            response = None
             try:
-                response = self.session.get(url)
+                response = self._get(account, url, headers)
+                if cached and response.status_code == 304:
+                    cached_response = self.response_cache.build_response(url, cached)
+                    if cached_response is not None:
+                        self.metrics.count(COUNTER_CACHE_HITS)
+                        account.throttle.on_success()
+                        return cached_response
+                    # 缓存文件丢失，重新完整请求
+                    response = self._get(account, url)
+                kind = classify(response.status_code)
+                if kind == OK:
+                    self.metrics.count(COUNTER_BYTES, len(response.content))
+                    account.throttle.on_success()
+                    if self.response_cache:
+                        self.response_cache.store(url, response)
+                    return response
                 response.raise_for_status()
-                return response
-            except Exception as e:
+            except requests.RequestException as e:
+                kind = classify(response.status_code) if response is not None else NETWORK_ERROR
+                if kind not in RETRYABLE:
+                    logging.warning(f"请求失败，不再重试: {str(e)}")
+                    raise
                 logging.warning(f"请求失败 (尝试 {i+1}/{max_retries}): {str(e)}")
-                if i < max_retries - 1:
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # 指数退避
-                else:
+                if i == max_retries - 1:
                     raise
+                self.metrics.count(COUNTER_RETRIES)
+                delay = account.throttle.on_failure(kind, i, response.headers if response is not None else None)
+                time.sleep(delay)
         return None
 
+    def _get(self, account: Account, url: str, headers: Optional[Dict] = None) -> 'requests.Response':
+        """用指定账号发送一次 GET 请求并记录耗时"""
+        self.metrics.count(COUNTER_REQUESTS)
+        with self.metrics.timer(STAGE_REQUEST):
+            return account.session.get(url, timeout=self.timeout, headers=headers)
+
+    def _fetch_json(self, url: str):
+        """请求并解析 JSON 接口"""
+        response = self.make_request(url)
+        with self.metrics.timer(STAGE_JSON):
+            return response.json()
+
+    def _fetch_novel_data(self, novel_id: Union[str, int]) -> Optional[Dict]:
+        """获取 /ajax/novel/{id} 的 body
+
+        返回空 body 时换其他账号重试；其他账号能获取到数据，说明之前的账号
+        登录已失效，将其移出轮换。所有账号都返回空 body 时返回 None，不停用账号。
+        """
+        ajax_url = f"{self.base_url}/ajax/novel/{novel_id}"
+        logging.info(f"正在获取小说信息: {ajax_url}")
+        
+        empty = []
+        while True:
+            with self.sessions.lease(exclude=empty) as account:
+                response = self.make_request(ajax_url, account)
+                if not response:
+                    return None
+                with self.metrics.timer(STAGE_JSON):
+                    novel = response.json().get('body')
+                if novel:
+                    break
+                empty.append(account)
+            if not self.sessions.has_other(empty):
+                logging.error("无法获取小说信息，可能是未登录或Cookie已过期")
+                return None
+            logging.warning(f"{account.name} 未获取到小说信息，换用其他账号重试")
+        
+        for expired in empty:
+            self.sessions.retire(expired, "登录已失效")
+        return novel
+
     def get_novel_info(self, novel_id: Union[str, int]) -> Optional[Dict]:
         """获取小说信息"""
         try:
             # 获取小说元数据
-            ajax_url = f"{self.base_url}/ajax/novel/{novel_id}"
-            logging.info(f"正在获取小说信息: {ajax_url}")
-            
-            response = self.make_request(ajax_url)
-            if not response:
-                return None
-            
-            novel_data = response.json()
-            if not novel_data.get('body'):
-                logging.error("无法获取小说信息，可能是未登录或Cookie已过期")
+            novel = self._fetch_novel_data(novel_id)
+            if not novel:
                 return None
             
-            novel = novel_data['body']
             logging.info(f"成功获取小说信息: {novel['title']}")
             
-            # 获取小说正文
-            logging.info("正在获取小说页面...")
-            page_url = f"{self.base_url}/novel/show.php?id={novel_id}"
-            
-            page_response = self.make_request(page_url)
-            if not page_response:
-                return None
-            
-            # 解析页面获取小说内容
-            soup = BeautifulSoup(page_response.text, 'html.parser')
-            content = ""
-            
-            # 尝试从预加载数据中获取内容
-            preload_data = soup.find('meta', {'id': 'meta-preload-data'})
-            if preload_data:
-                try:
-                    data = json.loads(preload_data.get('content', '{}'))
-                    if data.get('novel') and data['novel'].get(str(novel_id)):
-                        content = data['novel'][str(novel_id)].get('content', '')
-                except:
-                    pass
-            
-            # 如果预加载数据中没有内容，尝试从页面元素中获取
-            if not content:
-                content_div = soup.find('div', {'id': 'novel-content'})
-                if content_div:
-                    content = content_div.get_text('\n', strip=True)
-            
-            if not content:
-                logging.error("无法获取小说内容")
-                return None
+            # 优先使用接口返回的正文，没有时再请求页面
+            content = extract_ajax_content(novel) if use_ajax_content(self.config) else ""
+            if content:
+                self.content_stats.record(SOURCE_AJAX)
+            else:
+                logging.info("正在获取小说页面...")
+                page_url = f"{self.base_url}/novel/show.php?id={novel_id}"
+                
+                page_response = self.make_request(page_url)
+                if not page_response:
+                    return None
+                
+                # 解析页面获取小说内容
+                with self.metrics.timer(STAGE_PARSE):
+                    content = extract_page_content(page_response.text, novel_id)
+                if not content:
+                    self.content_stats.record(SOURCE_MISSING)
+                    logging.error("无法获取小说内容")
+                    return None
+                self.content_stats.record(SOURCE_HTML)
             
             logging.info("成功获取小说正文")
-            
-            # 检查是否为系列作品
-            series_info = None
-            if novel.get('seriesNavData'):
-                series = novel['seriesNavData']
-                series_info = {
-                    'id': series['seriesId'],
-                    'title': series['title']
-                }
-                logging.info(f"检测到系列作品: {series['title']}")
-            
-            # 获取标签
-            tags = []
-            if novel.get('tags'):
-                if isinstance(novel['tags'], list):
-                    tags = [tag['tag'] for tag in novel['tags']]
-                elif isinstance(novel['tags'], dict) and novel['tags'].get('tags'):
-                    tags = [tag['tag'] for tag in novel['tags']['tags']]
-            
-            return {
-                'id': str(novel_id),
-                'title': novel['title'],
-                'author': novel['userName'],
-                'content': content,
-                'series_info': series_info,
-                'create_date': novel.get('createDate', ''),
-                'tags': tags
-            }
+            return build_novel_info(novel_id, novel, content)
             
         except Exception as e:
             logging.error(f"获取小说信息失败: {str(e)}")
             return None
 
     def get_series_novels(self, series_id: Union[str, int]) -> List[str]:
-        """获取系列小说列表"""
+        """获取系列小说列表
+
+        Args:
+            series_id: 系列中任意一篇小说的ID
+        """
         try:
-            novels = []
-            
             # 先获取当前小说的信息
-            ajax_url = f"{self.base_url}/ajax/novel/{series_id}"
-            logging.info(f"正在获取小说信息: {ajax_url}")
-            
-            response = self.make_request(ajax_url)
-            if not response:
-                return []
-            
-            novel_data = response.json()
-            if not novel_data.get('body'):
-                logging.error("无法获取小说信息")
+            novel = self._fetch_novel_data(series_id)
+            if not novel:
                 return []
             
             # 获取系列信息
-            series_nav = novel_data['body'].get('seriesNavData')
+            series_nav = novel.get('seriesNavData')
             if not series_nav:
                 logging.info("不是系列作品")
                 return []
             
+            return self.list_series_novels(series_nav.get('seriesId'), series_nav, novel['id'])
+            
+        except Exception as e:
+            logging.error(f"获取系列小说列表失败: {str(e)}")
+            return []
+
+    def list_series_novels(self, series_id: Union[str, int], series_nav: Optional[Dict] = None,
+                           current_id: Optional[Union[str, int]] = None) -> List[str]:
+        """根据系列ID获取系列所有章节ID
+
+        Args:
+            series_id: 系列ID
+            series_nav: 小说的 seriesNavData，系列API失败时用于回退
+            current_id: 当前小说ID，系列API失败时用于回退
+        """
+        try:
             # 获取系列ID
-            series_id = str(series_nav.get('seriesId'))
+            series_id = str(series_id or '')
             if not series_id:
                 logging.error("无法获取系列ID")
                 return []
             
-            # 获取系列所有章节
-            series_url = f"{self.base_url}/ajax/novel/series/{series_id}?limit=500&last_order=0&order_by=asc"
-            series_response = self.make_request(series_url)
-            
-            if not series_response:
-                return []
-            
-            series_data = series_response.json()
-            if series_data.get('body') and series_data['body'].get('page') and series_data['body']['page'].get('series'):
-                for novel in series_data['body']['page']['series']:
-                    if novel.get('id'):
-                        novels.append(str(novel['id']))
+            # 分页获取系列所有章节
+            novels = [chapter['id'] for chapter in self.series_enumerator.list_chapters(series_id)]
             
             # 如果从系列API获取失败，使用导航数据
-            if not novels:
+            if not novels and series_nav:
                 logging.info("从系列API获取失败，使用导航数据...")
-                # 添加当前小说
-                novels.append(str(novel_data['body']['id']))
-                
-                # 获取前面的章节
-                current = series_nav
-                while current.get('prev') and current['prev'].get('id'):
-                    novels.append(str(current['prev']['id']))
-                    current = current['prev']
-                
-                # 获取后面的章节
-                current = series_nav
-                while current.get('next') and current['next'].get('id'):
-                    novels.append(str(current['next']['id']))
-                    current = current['next']
+                novels = parse_series_nav(series_nav, current_id)
             
-            # 去重并排序
-            novels = sorted(set(novels), key=lambda x: int(x))
             logging.info(f"找到 {len(novels)} 篇系列小说")
             return novels
             
@@ -238,8 +311,141 @@ class PixivNovelCrawler:
             logging.error(f"获取系列小说列表失败: {str(e)}")
             return []
 
+    def plan_series_download(self, novel_info: Dict, series_dir: str) -> Optional[List[str]]:
+        """规划系列下载
+
+        系列章节列表只解析一次，已下载集合只扫描一次，
+        返回仍需下载的小说ID；无法获取系列列表时返回 None。
+
+        Args:
+            novel_info: 系列中已获取的一篇小说信息
+            series_dir: 系列保存目录
+        """
+        series_info = novel_info['series_info']
+        series_novels = self.list_series_novels(series_info['id'], series_info.get('nav'), novel_info['id'])
+        if not series_novels:
+            return None
+        
+        downloaded_novels = utils.get_downloaded_novels(series_dir, self.index)
+        downloaded_novels.add(str(novel_info['id']))
+        
+        return [nid for nid in series_novels if nid not in downloaded_novels]
+
+    def download_novel(self, novel_id: Union[str, int], output_dir: str) -> bool:
+        """下载单篇小说到指定目录，不处理系列中的其他章节"""
+        novel_info = self.get_novel_info(novel_id)
+        if not novel_info:
+            return False
+        return self.save_novel(novel_info, output_dir) is not None
+
+    def save_novel(self, novel_info: Dict, output_dir: str) -> Optional[str]:
+        """按当前存储格式保存小说并记录到下载索引，返回文件路径"""
+        with self.metrics.timer(STAGE_SAVE):
+            return utils.save_novel(novel_info, output_dir, self.index, self.storage, self.search_index)
+
+    def download_novels(self, novel_ids: List[str], output_dir: str) -> Dict[str, bool]:
+        """批量下载小说到同一目录
+
+        Returns:
+            小说ID到下载结果的映射
+        """
+        return self.download_tasks([(novel_id, output_dir) for novel_id in novel_ids])
+
+    def _run_task(self, novel_id: str, output_dir: str) -> bool:
+        """执行一个下载任务，并在任务日志中记录状态"""
+        if self.journal is None:
+            return self.download_novel(novel_id, output_dir)
+        self.journal.start(novel_id)
+        try:
+            ok = self.download_novel(novel_id, output_dir)
+        except Exception as e:
+            self.journal.finish(novel_id, False, str(e))
+            raise
+        self.journal.finish(novel_id, ok, None if ok else "获取或保存失败")
+        return ok
+
+    def download_tasks(self, tasks: List[Tuple[str, str]]) -> Dict[str, bool]:
+        """批量下载小说
+
+        MAX_WORKERS 大于 1 时使用线程池并发下载。每个请求借用会话池中负载最低的账号，
+        请求速率由该账号的限速器和限流控制器控制，总速率随账号数增加。
+        任务在开始前登记到任务日志，中断后可用 resume 继续。
+
+        Args:
+            tasks: (小说ID, 保存目录) 列表
+
+        Returns:
+            小说ID到下载结果的映射
+        """
+        from tqdm import tqdm
+
+        results = {}
+        total = len(tasks)
+        if self.journal is not None and tasks:
+            self.journal.enqueue(tasks)
+        with tqdm(total=total, desc="下载进度", disable=not self.config.get('SHOW_PROGRESS', True)) as pbar:
+            if self.max_workers == 1:
+                for idx, (novel_id, output_dir) in enumerate(tasks, 1):
+                    logging.info(f"\n爬取系列作品 {idx}/{total}")
+                    try:
+                        results[novel_id] = self._run_task(novel_id, output_dir)
+                    except Exception as e:
+                        logging.error(f"下载小说 {novel_id} 失败: {str(e)}")
+                        results[novel_id] = False
+                    pbar.update(1)
+                return results
+            
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {executor.submit(self._run_task, novel_id, output_dir): novel_id
+                           for novel_id, output_dir in tasks}
+                for future in as_completed(futures):
+                    novel_id = futures[future]
+                    try:
+                        results[novel_id] = future.result()
+                    except Exception as e:
+                        logging.error(f"下载小说 {novel_id} 失败: {str(e)}")
+                        results[novel_id] = False
+                    pbar.update(1)
+        return results
+
+    def resume(self) -> Dict[str, bool]:
+        """继续任务日志中未完成的下载
+
+        只重试排队中、中断和失败的任务，不重新获取系列目录，也不扫描下载目录。
+        某个系列目录的任务全部完成后标记该系列下载完成。
+
+        Returns:
+            小说ID到下载结果的映射
+        """
+        if self.journal is None:
+            logging.error("任务日志未启用（USE_JOURNAL = False）")
+            return {}
+        tasks = self.journal.pending()
+        if not tasks:
+            logging.info("没有未完成的下载任务")
+            return {}
+        
+        logging.info(f"继续 {len(tasks)} 个未完成的下载任务")
+        results = self.download_tasks(tasks)
+        
+        download_path = os.path.abspath(self.config['DOWNLOAD_PATH'])
+        for output_dir in {output_dir for _, output_dir in tasks}:
+            if os.path.abspath(output_dir) != download_path and self.journal.is_settled(output_dir):
+                utils.mark_series_completed(output_dir)
+        return results
+
+    def report(self) -> None:
+        """输出正文来源、账号、响应缓存和各阶段耗时统计"""
+        logging.info(f"正文来源: {self.content_stats.summary()}")
+        if self._sessions is not None and len(self._sessions.accounts) > 1:
+            logging.info(f"账号请求: {self._sessions.summary()}")
+        if self.response_cache:
+            logging.info(f"响应缓存: {self.response_cache.summary()}")
+        report_metrics(self.metrics, self.config)
+
     def crawl_novel(self, novel_id: Union[str, int]) -> bool:
-        """爬取小说"""
+        """爬取小说，结束时输出本次爬取的耗时统计"""
+        self.metrics.reset()
         try:
             logging.info(f"\n开始爬取小说 ID: {novel_id}")
             novel_info = self.get_novel_info(novel_id)
@@ -247,30 +453,19 @@ class PixivNovelCrawler:
             if not novel_info:
                 return False
             
-            if novel_info['series_info']:
-                # 如果是系列作品，创建系列目录
-                series_dir = os.path.join(self.config['DOWNLOAD_PATH'], novel_info['series_info']['title'])
-            else:
-                # 如果是单独作品，保存在主目录
-                series_dir = self.config['DOWNLOAD_PATH']
+            series_dir = utils.get_novel_dir(novel_info, self.config['DOWNLOAD_PATH'])
             
-            saved_file = utils.save_novel(novel_info, series_dir)
+            self.save_novel(novel_info, series_dir)
             
             # 如果是系列作品，检查是否需要下载其他部分
             if novel_info['series_info']:
                 logging.info(f"\n检测到系列作品：{novel_info['series_info']['title']}")
                 
-                # 获取系列列表
-                series_novels = self.get_series_novels(novel_id)
-                if not series_novels:
+                # 一次性规划需要下载的章节
+                novels_to_download = self.plan_series_download(novel_info, series_dir)
+                if novels_to_download is None:
                     return True
                 
-                # 获取已下载的小说ID
-                downloaded_novels = utils.get_downloaded_novels(series_dir)
-                
-                # 计算需要下载的小说
-                novels_to_download = [nid for nid in series_novels if nid not in downloaded_novels]
-                
                 if not novels_to_download:
                     logging.info("系列中的所有小说都已下载完成")
                     utils.mark_series_completed(series_dir)
@@ -278,13 +473,12 @@ class PixivNovelCrawler:
                 
                 logging.info(f"发现 {len(novels_to_download)} 篇未下载的小说")
                 
-                # 下载未下载的小说
-                with tqdm(total=len(novels_to_download), desc="下载进度", disable=not self.config.get('SHOW_PROGRESS', True)) as pbar:
-                    for idx, series_novel_id in enumerate(novels_to_download, 1):
-                        logging.info(f"\n爬取系列作品 {idx}/{len(novels_to_download)}")
-                        self.crawl_novel(series_novel_id)
-                        time.sleep(self.config.get('SLEEP_TIME', 1))
-                        pbar.update(1)
+                # 下载未下载的小说（不再递归解析系列）
+                results = self.download_novels(novels_to_download, series_dir)
+                failed = [nid for nid, ok in results.items() if not ok]
+                if failed:
+                    logging.warning(f"{len(failed)} 篇小说下载失败: {', '.join(failed)}")
+                    return True
                 
                 utils.mark_series_completed(series_dir)
             
@@ -292,4 +486,6 @@ class PixivNovelCrawler:
             
         except Exception as e:
             logging.error(f"爬取失败: {str(e)}")
-            return False 
\ No newline at end of file
+            return False
+        finally:
+            self.report() 
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""EPUB 导出模块
+
+把系列目录中的章节导出为 EPUB 3 电子书：每章一个 XHTML 文件，目录（nav.xhtml
+和兼容旧阅读器的 toc.ncx）由章节元数据生成。章节逐行流式写入 zip 容器，
+内存中最多只有一行正文，导出大型系列的开销与章节数成正比，阅读器也可以
+按需加载单个章节。正文中的 pixiv 标记转换为换页、小标题和 <ruby> 注音。
+"""
+
+import html
+import io
+import logging
+import os
+import re
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, TextIO
+
+from .index import DownloadIndex
+from .markup import BLOCK_KINDS, CHAPTER, LINK, NEWPAGE, RUBY, TEXT, tokenize
+from .storage import open_novel
+from .utils import get_series_chapters, parse_header, read_header_lines
+
+EPUB_SUFFIX = '.epub'
+
+# XML 1.0 不允许的控制字符
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+_CONTAINER_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+_CSS = """body { line-height: 1.8; }
+h1 { font-size: 1.4em; margin: 1em 0; }
+p { margin: 0; text-indent: 1em; }
+p.blank { height: 1em; }
+h2 { font-size: 1.2em; margin: 1em 0; }
+hr.pagebreak { border: none; page-break-after: always; break-after: page; }
+p.image { text-indent: 0; text-align: center; color: #666; }
+.meta { font-size: 0.85em; color: #666; text-indent: 0; }
+"""
+
+
+def escape(text: str) -> str:
+    """转义文本并去掉 XML 不允许的字符"""
+    return html.escape(_INVALID_XML_CHARS.sub('', text), quote=True)
+
+
+def chapter_path(i: int) -> str:
+    """第 i 章（从 1 开始）在 OEBPS 目录中的路径"""
+    return f"text/chapter{i:05d}.xhtml"
+
+
+def _xhtml_head(title: str, language: str) -> str:
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE html>\n'
+            f'<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" '
+            f'lang="{language}" xml:lang="{language}">\n'
+            f'<head>\n<meta charset="UTF-8"/>\n<title>{escape(title)}</title>\n'
+            '<link rel="stylesheet" type="text/css" href="../style.css"/>\n</head>\n')
+
+
+def render_line(line: str) -> str:
+    """将一行正文转换为 XHTML 段落
+
+    换页、章节标题和插画单独成块，注音转换为 <ruby>，链接转换为 <a>。
+    """
+    if '[' not in line:
+        return f'<p>{escape(line)}</p>\n'
+    blocks = []
+    inline = []
+    for kind, text, value in tokenize(line):
+        if kind in BLOCK_KINDS:
+            if ''.join(inline).strip():
+                blocks.append(f'<p>{"".join(inline)}</p>\n')
+            inline = []
+            if kind == NEWPAGE:
+                blocks.append('<hr class="pagebreak"/>\n')
+            elif kind == CHAPTER:
+                blocks.append(f'<h2>{escape(text)}</h2>\n')
+            else:
+                blocks.append(f'<p class="image">［插图：{escape(value)}］</p>\n')
+        elif kind == TEXT:
+            inline.append(escape(text))
+        elif kind == RUBY:
+            inline.append(f'<ruby>{escape(text)}<rt>{escape(value)}</rt></ruby>')
+        elif kind == LINK:
+            inline.append(f'<a href="{escape(value)}">{escape(text or value)}</a>')
+    if ''.join(inline).strip():
+        blocks.append(f'<p>{"".join(inline)}</p>\n')
+    return ''.join(blocks)
+
+
+def write_chapter(src: TextIO, dst: TextIO, header: Dict[str, str], language: str) -> None:
+    """把一章正文逐行写为 XHTML
+
+    Args:
+        src: 停在正文开头的章节文件
+        dst: 输出流
+        header: 章节元数据
+        language: 书籍语言
+    """
+    title = header.get('title', '')
+    dst.write(_xhtml_head(title, language))
+    dst.write(f'<body>\n<section epub:type="chapter">\n<h1>{escape(title)}</h1>\n')
+    meta = [header.get(key) for key in ('author', 'create_date', 'tags') if header.get(key)]
+    if meta:
+        dst.write(f'<p class="meta">{escape(" / ".join(meta))}</p>\n')
+
+    # 去掉正文首尾的空行，中间的空行保留为段落间距
+    blank = 0
+    started = False
+    for line in src:
+        line = line.rstrip()
+        if not line:
+            blank += 1
+            continue
+        if started:
+            dst.write('<p class="blank"></p>\n' * max(0, blank - 1))
+        started = True
+        blank = 0
+        dst.write(render_line(line))
+    dst.write('</section>\n</body>\n</html>\n')
+
+
+def _nav_xhtml(book_title: str, chapters: List[Dict], language: str) -> str:
+    items = ''.join(f'<li><a href="{chapter_path(i)}">{escape(chapter["title"])}</a></li>\n'
+                    for i, chapter in enumerate(chapters, 1))
+    return (_xhtml_head(book_title, language).replace('../style.css', 'style.css')
+            + f'<body>\n<nav epub:type="toc" id="toc">\n<h1>目录</h1>\n<ol>\n{items}</ol>\n</nav>\n</body>\n</html>\n')
+
+
+def _toc_ncx(book_id: str, book_title: str, chapters: List[Dict]) -> str:
+    points = ''.join(
+        f'<navPoint id="nav{i}" playOrder="{i}"><navLabel><text>{escape(chapter["title"])}</text></navLabel>'
+        f'<content src="{chapter_path(i)}"/></navPoint>\n'
+        for i, chapter in enumerate(chapters, 1)
+    )
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">\n'
+            f'<head><meta name="dtb:uid" content="{book_id}"/></head>\n'
+            f'<docTitle><text>{escape(book_title)}</text></docTitle>\n'
+            f'<navMap>\n{points}</navMap>\n</ncx>\n')
+
+
+def _content_opf(book_id: str, book_title: str, author: str, language: str, chapters: List[Dict]) -> str:
+    modified = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    manifest = ''.join(f'<item id="c{i}" href="{chapter_path(i)}" media-type="application/xhtml+xml"/>\n'
+                       for i in range(1, len(chapters) + 1))
+    spine = ''.join(f'<itemref idref="c{i}"/>\n' for i in range(1, len(chapters) + 1))
+    creator = f'<dc:creator>{escape(author)}</dc:creator>\n' if author else ''
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id">\n'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">\n'
+            f'<dc:identifier id="book-id">{book_id}</dc:identifier>\n'
+            f'<dc:title>{escape(book_title)}</dc:title>\n{creator}'
+            f'<dc:language>{language}</dc:language>\n'
+            f'<meta property="dcterms:modified">{modified}</meta>\n'
+            '</metadata>\n<manifest>\n'
+            '<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>\n'
+            '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>\n'
+            '<item id="css" href="style.css" media-type="text/css"/>\n'
+            f'{manifest}</manifest>\n<spine toc="ncx">\n{spine}</spine>\n</package>\n')
+
+
+def export_epub(series_dir: str, output_filename: Optional[str] = None,
+                index: Optional[DownloadIndex] = None, language: str = 'zh') -> Optional[str]:
+    """将系列导出为 EPUB
+
+    先确定章节顺序（与 merge_series 相同），再逐章流式写入 zip 容器，
+    最后写入依赖全部章节的目录和 content.opf。先写入临时文件，完成后再重命名。
+
+    Args:
+        series_dir: 系列小说所在目录
+        output_filename: 输出文件名（可选），默认为 系列名.epub
+        index: 下载索引（可选），用于确定章节顺序
+        language: 书籍语言
+
+    Returns:
+        EPUB 文件路径，失败则返回 None
+    """
+    try:
+        if not os.path.exists(series_dir):
+            logging.error(f"系列目录不存在: {series_dir}")
+            return None
+        chapters = get_series_chapters(series_dir, index)
+        if not chapters:
+            logging.error(f"目录中没有找到小说文件: {series_dir}")
+            return None
+
+        book_title = os.path.basename(os.path.normpath(series_dir))
+        book_id = f"urn:uuid:{uuid.uuid5(uuid.NAMESPACE_URL, 'pixiv-novel-series:' + book_title)}"
+        output_path = os.path.join(series_dir, output_filename or book_title + EPUB_SUFFIX)
+        tmp_path = output_path + '.tmp'
+        author = ''
+
+        try:
+            with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as book:
+                # mimetype 必须是第一个文件且不压缩
+                book.writestr('mimetype', 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
+                book.writestr('META-INF/container.xml', _CONTAINER_XML)
+                book.writestr('OEBPS/style.css', _CSS)
+
+                for i, chapter in enumerate(chapters, 1):
+                    with open_novel(os.path.join(series_dir, chapter['filename'])) as src:
+                        header = parse_header(read_header_lines(src) or [])
+                        header.setdefault('title', chapter['title'])
+                        author = author or header.get('author', '')
+                        raw = book.open(f"OEBPS/{chapter_path(i)}", 'w')
+                        with io.TextIOWrapper(raw, encoding='utf-8', newline='\n') as dst:
+                            write_chapter(src, dst, header, language)
+
+                book.writestr('OEBPS/nav.xhtml', _nav_xhtml(book_title, chapters, language))
+                book.writestr('OEBPS/toc.ncx', _toc_ncx(book_id, book_title, chapters))
+                book.writestr('OEBPS/content.opf', _content_opf(book_id, book_title, author, language, chapters))
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        logging.info(f"系列小说已导出为 EPUB: {output_path}（{len(chapters)} 章）")
+        return output_path
+
+    except Exception as e:
+        logging.error(f"导出 EPUB 失败: {str(e)}")
+        return None
+
@@ -0,0 +1,368 @@
+"""下载索引模块
+
+在下载目录中用 SQLite 记录每篇已保存的小说及其元数据（作者、标签、
+创建时间、系列），查询"是否已下载"或按元数据筛选时无需再打开章节文件。
+"""
+
+import hashlib
+import logging
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+INDEX_FILENAME = '.download_index.sqlite'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS novels (
+    novel_id TEXT PRIMARY KEY,
+    series_id TEXT,
+    series_dir TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    title TEXT,
+    series_order INTEGER,
+    author TEXT,
+    create_date TEXT
+);
+CREATE TABLE IF NOT EXISTS novel_tags (
+    tag TEXT NOT NULL,
+    novel_id TEXT NOT NULL,
+    PRIMARY KEY (tag, novel_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_novel_tags_novel_id ON novel_tags (novel_id);
+CREATE INDEX IF NOT EXISTS idx_novels_series_dir ON novels (series_dir);
+CREATE INDEX IF NOT EXISTS idx_novels_series_id ON novels (series_id);
+"""
+
+# 旧版本索引缺少的列
+_MIGRATIONS = {
+    'title': "ALTER TABLE novels ADD COLUMN title TEXT",
+    'series_order': "ALTER TABLE novels ADD COLUMN series_order INTEGER",
+    'author': "ALTER TABLE novels ADD COLUMN author TEXT",
+    'create_date': "ALTER TABLE novels ADD COLUMN create_date TEXT",
+}
+
+# 依赖迁移后列的索引
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_novels_author ON novels (author);
+CREATE INDEX IF NOT EXISTS idx_novels_create_date ON novels (create_date);
+"""
+
+
+def content_hash(content: str) -> str:
+    """计算正文的 SHA-256"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+class DownloadIndex:
+    """已下载小说索引
+
+    路径均以相对下载目录的形式保存，移动整个下载目录后索引依然有效。
+    同一实例可在多个线程间共享。
+    """
+
+    def __init__(self, download_path: str, read_only: bool = False):
+        """打开（必要时创建）下载目录中的索引
+
+        Args:
+            download_path: 下载目录
+            read_only: 以只读方式打开已有的索引，不创建、不升级表结构，
+                供多个进程同时读取
+
+        Raises:
+            sqlite3.OperationalError: 只读打开时索引不存在
+        """
+        self.download_path = download_path
+        self.db_path = os.path.join(download_path, INDEX_FILENAME)
+        # 新建的索引需要从已有文件回填
+        self.created = not read_only and not os.path.exists(self.db_path)
+        # 旧版本索引升级后，新增的元数据列需要回填
+        self.migrated = False
+        self._lock = threading.Lock()
+        if read_only:
+            uri = pathlib.Path(os.path.abspath(self.db_path)).as_uri() + '?mode=ro'
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            return
+        os.makedirs(download_path, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row['name'] for row in self._conn.execute("PRAGMA table_info(novels)")}
+            for column, statement in _MIGRATIONS.items():
+                if column not in columns:
+                    self._conn.execute(statement)
+                    self.migrated = True
+            self._conn.executescript(_INDEXES)
+            self._conn.commit()
+
+    def close(self) -> None:
+        """关闭索引"""
+        with self._lock:
+            self._conn.close()
+
+    def _relpath(self, path: str) -> str:
+        """转换为相对下载目录的路径"""
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.download_path))
+
+    def _dirkey(self, series_dir: str) -> str:
+        """目录在 series_dir 列中的值，下载目录本身（单独作品）为空字符串"""
+        relpath = self._relpath(series_dir)
+        return '' if relpath == os.curdir else relpath
+
+    def record(self, novel_id: str, path: str, content_hash: str,
+               series_id: Optional[str] = None, fetched_at: Optional[float] = None,
+               title: Optional[str] = None, series_order: Optional[int] = None,
+               author: Optional[str] = None, create_date: Optional[str] = None,
+               tags: Iterable[str] = ()) -> None:
+        """记录一篇已保存的小说
+
+        Args:
+            novel_id: 小说ID
+            path: 小说文件路径
+            content_hash: 正文哈希
+            series_id: 系列ID，单独作品为 None
+            fetched_at: 获取时间戳，默认为当前时间
+            title: 小说标题
+            series_order: 系列接口给出的章节序号
+            author: 作者
+            create_date: 创建时间（ISO 8601）
+            tags: 标签
+        """
+        relpath = self._relpath(path)
+        novel_id = str(novel_id)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO novels "
+                "(novel_id, series_id, series_dir, path, size, content_hash, fetched_at, title, series_order, "
+                "author, create_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (novel_id, str(series_id) if series_id else None, self._dirkey(os.path.dirname(path)),
+                 relpath, os.path.getsize(path), content_hash,
+                 fetched_at if fetched_at is not None else time.time(),
+                 title, series_order, author or None, create_date or None)
+            )
+            self._conn.execute("DELETE FROM novel_tags WHERE novel_id = ?", (novel_id,))
+            self._conn.executemany("INSERT OR IGNORE INTO novel_tags (tag, novel_id) VALUES (?, ?)",
+                                   [(tag, novel_id) for tag in tags if tag])
+            self._conn.commit()
+
+    def get(self, novel_id: str) -> Optional[Dict]:
+        """查询一篇小说的索引记录，路径为绝对路径"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM novels WHERE novel_id = ?", (str(novel_id),)).fetchone()
+        if not row:
+            return None
+        record = dict(row)
+        record['path'] = os.path.join(self.download_path, record['path'])
+        return record
+
+    def downloaded_ids(self, series_dir: str) -> Set[str]:
+        """获取目录中已下载的小说ID
+
+        只返回文件仍在目录中的记录（列一次目录，不读取文件），
+        被删除的章节会重新下载。
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT novel_id, path FROM novels WHERE series_dir = ?",
+                                      (self._dirkey(series_dir),)).fetchall()
+        if not rows:
+            return set()
+        try:
+            files = set(os.listdir(series_dir))
+        except OSError:
+            return set()
+        return {row['novel_id'] for row in rows if os.path.basename(row['path']) in files}
+
+    def series_chapters(self, series_dir: str) -> List[Dict]:
+        """获取目录中已索引的章节，按章节序号排序（没有序号的排在最后）
+
+        Returns:
+            章节列表，包含 novel_id、path（绝对路径）、title、series_order
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT novel_id, path, title, series_order FROM novels WHERE series_dir = ? "
+                "ORDER BY series_order IS NULL, series_order, CAST(novel_id AS INTEGER)",
+                (self._dirkey(series_dir),)
+            ).fetchall()
+        chapters = []
+        for row in rows:
+            chapter = dict(row)
+            chapter['path'] = os.path.join(self.download_path, chapter['path'])
+            chapters.append(chapter)
+        return chapters
+
+    def find(self, tags: Iterable[str] = (), author: Optional[str] = None,
+             series_id: Optional[str] = None, since: Optional[str] = None,
+             until: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """按元数据筛选已下载的小说，条件之间为"且"的关系
+
+        Args:
+            tags: 必须同时带有的标签
+            author: 作者
+            series_id: 系列ID
+            since: 创建时间下限（含），如 2024-01-01
+            until: 创建时间上限（不含）
+            limit: 最多返回的数量
+
+        Returns:
+            按创建时间倒序排列的小说，包含 novel_id、title、author、create_date、
+            series_id、series_order、tags（列表）和 path（绝对路径）
+        """
+        conditions = []
+        params = []
+        for tag in tags:
+            conditions.append("novel_id IN (SELECT novel_id FROM novel_tags WHERE tag = ?)")
+            params.append(tag)
+        if author:
+            conditions.append("author = ?")
+            params.append(author)
+        if series_id:
+            conditions.append("series_id = ?")
+            params.append(str(series_id))
+        if since:
+            conditions.append("create_date >= ?")
+            params.append(since)
+        if until:
+            conditions.append("create_date < ?")
+            params.append(until)
+
+        sql = ("SELECT novel_id, title, author, create_date, series_id, series_order, path, "
+               "(SELECT group_concat(tag, char(10)) FROM novel_tags t WHERE t.novel_id = novels.novel_id) AS tags "
+               "FROM novels")
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY create_date DESC, CAST(novel_id AS INTEGER) DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        results = []
+        for row in rows:
+            novel = dict(row)
+            novel['tags'] = novel['tags'].split('\n') if novel['tags'] else []
+            novel['path'] = os.path.join(self.download_path, novel['path'])
+            results.append(novel)
+        return results
+
+    def rebuild(self) -> int:
+        """扫描下载目录中已有的小说文件，重建索引
+
+        元数据中没有系列ID的旧文件沿用重建前索引中记录的系列ID。
+
+        Returns:
+            写入索引的小说数量
+        """
+        with self._lock:
+            series_ids = {row['novel_id']: row['series_id'] for row in
+                          self._conn.execute("SELECT novel_id, series_id FROM novels WHERE series_id IS NOT NULL")}
+            self._conn.execute("DELETE FROM novels")
+            self._conn.execute("DELETE FROM novel_tags")
+            self._conn.commit()
+
+        count = 0
+        for filepath, header in self._scan_headers():
+            if self._record_file(filepath, header, series_ids.get(header['id'])):
+                count += 1
+
+        logging.info(f"索引重建完成，共 {count} 篇小说")
+        return count
+
+    def backfill(self) -> int:
+        """旧版本索引升级后，从文件元数据回填新增的列
+
+        只读取元数据行并就地更新已有记录，系列ID、正文哈希等原有的列保持不变；
+        索引中没有记录的文件按 rebuild 的方式补录。
+
+        Returns:
+            回填的小说数量
+        """
+        count = 0
+        for filepath, header in self._scan_headers():
+            fields = _header_fields(header)
+            with self._lock:
+                updated = self._conn.execute(
+                    "UPDATE novels SET title = COALESCE(?, title), series_order = COALESCE(?, series_order), "
+                    "author = ?, create_date = ? WHERE novel_id = ?",
+                    (fields['title'], fields['series_order'], fields['author'], fields['create_date'], header['id'])
+                ).rowcount
+                if updated:
+                    self._conn.execute("DELETE FROM novel_tags WHERE novel_id = ?", (header['id'],))
+                    self._conn.executemany("INSERT OR IGNORE INTO novel_tags (tag, novel_id) VALUES (?, ?)",
+                                           [(tag, header['id']) for tag in fields['tags']])
+                    self._conn.commit()
+            if updated or self._record_file(filepath, header):
+                count += 1
+
+        logging.info(f"索引升级完成，回填 {count} 篇小说的元数据")
+        return count
+
+    def _scan_headers(self) -> Iterator[Tuple[str, Dict[str, str]]]:
+        """遍历下载目录中的小说文件，只读取元数据，产出 (文件路径, 元数据)"""
+        from .storage import open_novel
+        from .utils import is_novel_file, parse_header, read_header_lines
+
+        for root, _, files in os.walk(self.download_path):
+            for filename in files:
+                if not is_novel_file(filename):
+                    continue
+                filepath = os.path.join(root, filename)
+                try:
+                    with open_novel(filepath) as f:
+                        header = parse_header(read_header_lines(f) or [])
+                except Exception as e:
+                    logging.warning(f"读取文件失败 {filepath}: {str(e)}")
+                    continue
+                if header.get('id'):
+                    yield filepath, header
+
+    def _record_file(self, filepath: str, header: Dict[str, str], series_id: Optional[str] = None) -> bool:
+        """读取正文并按文件元数据记录一篇小说，读取失败时返回 False"""
+        from .utils import read_novel_file
+
+        try:
+            _, content = read_novel_file(filepath)
+        except Exception as e:
+            logging.warning(f"读取文件失败 {filepath}: {str(e)}")
+            return False
+        self.record(header['id'], filepath, content_hash(content),
+                    series_id=header.get('series_id') or series_id,
+                    fetched_at=os.path.getmtime(filepath), **_header_fields(header))
+        return True
+
+
+def _header_fields(header: Dict[str, str]) -> Dict:
+    """文件元数据中可以写入索引的字段"""
+    order = header.get('order')
+    tags = header.get('tags')
+    return {
+        'title': header.get('title'),
+        'series_order': int(order) if order and order.isdigit() else None,
+        'author': header.get('author') or None,
+        'create_date': header.get('create_date') or None,
+        'tags': [tag for tag in tags.split(', ') if tag] if tags else [],
+    }
+
+
+def open_download_index(config: Dict) -> Optional[DownloadIndex]:
+    """根据配置打开下载索引，USE_INDEX 为 False 时返回 None
+
+    首次创建索引时扫描下载目录录入已有的小说；旧版本索引升级后只回填新增的列。
+    """
+    if not config.get('USE_INDEX', True):
+        return None
+    index = DownloadIndex(config.get('DOWNLOAD_PATH', 'novels'))
+    if index.created:
+        index.rebuild()
+    elif index.migrated:
+        index.backfill()
+    return index
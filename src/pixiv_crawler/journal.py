@@ -0,0 +1,150 @@
+"""下载任务日志模块
+
+在下载目录中用 SQLite 记录每个下载任务的状态（排队、进行中、完成、失败）
+和尝试次数。进程中途退出后，resume 直接从日志取出未完成的任务继续下载，
+无需重新获取系列目录或扫描下载目录。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+JOURNAL_FILENAME = '.download_jobs.sqlite'
+
+# 任务状态
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    novel_id TEXT PRIMARY KEY,
+    output_dir TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (state);
+"""
+
+
+class JobJournal:
+    """下载任务日志
+
+    保存目录以相对下载目录的形式记录。同一实例可在多个线程间共享。
+    """
+
+    def __init__(self, download_path: str):
+        """打开（必要时创建）下载目录中的任务日志
+
+        Args:
+            download_path: 下载目录
+        """
+        self.download_path = download_path
+        os.makedirs(download_path, exist_ok=True)
+        self.db_path = os.path.join(download_path, JOURNAL_FILENAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def close(self) -> None:
+        """关闭任务日志"""
+        with self._lock:
+            self._conn.close()
+
+    def _relpath(self, path: str) -> str:
+        """转换为相对下载目录的路径"""
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.download_path))
+
+    def enqueue(self, tasks: List[Tuple[str, str]]) -> None:
+        """登记一批下载任务
+
+        已完成的旧任务会被清理；已登记的任务重新排队，尝试次数保留。
+
+        Args:
+            tasks: (小说ID, 保存目录) 列表
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE state = ?", (DONE,))
+            self._conn.executemany(
+                "INSERT INTO jobs (novel_id, output_dir, state, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (novel_id) DO UPDATE SET output_dir = excluded.output_dir, "
+                "state = excluded.state, updated_at = excluded.updated_at",
+                [(str(novel_id), self._relpath(output_dir), QUEUED, now) for novel_id, output_dir in tasks]
+            )
+            self._conn.commit()
+
+    def start(self, novel_id: str) -> None:
+        """标记任务开始，尝试次数加一"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, updated_at = ? WHERE novel_id = ?",
+                (RUNNING, time.time(), str(novel_id))
+            )
+            self._conn.commit()
+
+    def finish(self, novel_id: str, ok: bool, error: Optional[str] = None) -> None:
+        """记录任务结果
+
+        Args:
+            novel_id: 小说ID
+            ok: 是否下载成功
+            error: 失败原因
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, updated_at = ? WHERE novel_id = ?",
+                (DONE if ok else FAILED, None if ok else error, time.time(), str(novel_id))
+            )
+            self._conn.commit()
+
+    def pending(self) -> List[Tuple[str, str]]:
+        """获取未完成的任务：排队中、中断时仍在进行以及失败的任务
+
+        Returns:
+            (小说ID, 保存目录) 列表，按登记顺序排列
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT novel_id, output_dir FROM jobs WHERE state != ? ORDER BY rowid", (DONE,)
+            ).fetchall()
+        return [(row['novel_id'], os.path.join(self.download_path, row['output_dir'])) for row in rows]
+
+    def failures(self) -> List[Dict]:
+        """获取失败的任务，包含尝试次数和失败原因"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT novel_id, attempts, error FROM jobs WHERE state = ? ORDER BY rowid", (FAILED,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """统计各状态的任务数量"""
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state").fetchall()
+        return {row['state']: row['n'] for row in rows}
+
+    def is_settled(self, output_dir: str) -> bool:
+        """目录中的任务是否已全部完成"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM jobs WHERE output_dir = ? AND state != ? LIMIT 1",
+                (self._relpath(output_dir), DONE)
+            ).fetchone()
+        return row is None
+
+
+def open_job_journal(config: Dict) -> Optional[JobJournal]:
+    """根据配置打开任务日志，USE_JOURNAL 为 False 时返回 None"""
+    if not config.get('USE_JOURNAL', True):
+        return None
+    return JobJournal(config.get('DOWNLOAD_PATH', 'novels'))
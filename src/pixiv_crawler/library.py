@@ -0,0 +1,202 @@
+"""整库合并模块
+
+扫描下载目录中的所有系列目录，用进程池并行合并为 txt 或导出为 EPUB，
+结果随完成顺序输出。
+每个系列记录合并时章节文件的签名（文件名、大小、修改时间），签名未变化且
+合并文件仍存在的系列直接跳过，重新合并整个下载目录的耗时只与变化的系列数
+和 CPU 核数有关。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from . import utils
+
+MERGE_STATE_FILENAME = '.merge_state.json'
+
+# 合并文件格式版本，修改 merge_series 的输出格式后递增，所有系列会重新合并
+MERGE_FORMAT_VERSION = 2
+
+# 输出格式
+MERGE_FORMATS = ('txt', 'epub')
+
+# 合并结果
+RESULT_MERGED = 'merged'
+RESULT_SKIPPED = 'skipped'
+RESULT_FAILED = 'failed'
+
+
+def merged_filename(series_dir: str, fmt: str = 'txt') -> str:
+    """整库合并的输出文件名，重复合并时覆盖同一个文件"""
+    return f"{os.path.basename(series_dir)}_合并.{fmt}"
+
+
+def find_series_dirs(download_path: str) -> List[str]:
+    """列出下载目录中包含章节文件的系列目录（忽略以 . 开头的目录）"""
+    series_dirs = []
+    with os.scandir(download_path) as entries:
+        for entry in entries:
+            if entry.name.startswith('.') or not entry.is_dir():
+                continue
+            with os.scandir(entry.path) as files:
+                if any(utils.is_novel_file(f.name) for f in files if f.is_file()):
+                    series_dirs.append(entry.path)
+    return sorted(series_dirs)
+
+
+def series_signature(series_dir: str) -> str:
+    """根据章节文件的文件名、大小和修改时间计算系列签名，不读取文件内容"""
+    output = merged_filename(series_dir)
+    entries = []
+    with os.scandir(series_dir) as files:
+        for f in files:
+            if f.name == output or not f.is_file() or not utils.is_novel_file(f.name):
+                continue
+            stat = f.stat()
+            entries.append(f"{f.name}\0{stat.st_size}\0{stat.st_mtime_ns}")
+    entries.sort()
+    digest = hashlib.sha1(f"v{MERGE_FORMAT_VERSION}".encode('utf-8'))
+    for entry in entries:
+        digest.update(b'\n' + entry.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class MergeState:
+    """各系列上次合并时的签名，保存在下载目录的 .merge_state.json 中"""
+
+    def __init__(self, download_path: str):
+        """加载合并记录
+
+        Args:
+            download_path: 下载目录
+        """
+        self.download_path = download_path
+        self.path = os.path.join(download_path, MERGE_STATE_FILENAME)
+        self._lock = threading.Lock()
+        self.series = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.series = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"读取合并记录失败，将重新合并所有系列: {str(e)}")
+
+    def _key(self, series_dir: str) -> str:
+        return os.path.relpath(os.path.abspath(series_dir), os.path.abspath(self.download_path))
+
+    def save(self) -> None:
+        """写入合并记录"""
+        with self._lock:
+            data = json.dumps(self.series, ensure_ascii=False, indent=2).encode('utf-8')
+        utils.write_atomic(self.path, data)
+
+    def is_current(self, series_dir: str, signature: str, fmt: str = 'txt') -> bool:
+        """系列自上次以该格式合并后是否没有变化，且合并文件仍存在"""
+        with self._lock:
+            record = self.series.get(self._key(series_dir), {}).get(fmt)
+        return (record is not None and record['signature'] == signature
+                and os.path.exists(os.path.join(series_dir, record['output'])))
+
+    def update(self, series_dir: str, signature: str, output_path: str, fmt: str = 'txt') -> None:
+        """记录系列的合并结果"""
+        with self._lock:
+            self.series.setdefault(self._key(series_dir), {})[fmt] = {
+                'signature': signature,
+                'output': os.path.basename(output_path),
+            }
+
+
+_worker_index = None
+
+
+def _init_worker(download_path: str, use_index: bool, log_level: str) -> None:
+    """子进程初始化：配置日志，以只读方式打开本进程使用的下载索引"""
+    global _worker_index
+    from .index import DownloadIndex
+
+    utils.setup_logging(log_level)
+    _worker_index = DownloadIndex(download_path, read_only=True) if use_index else None
+
+
+def _merge_worker(series_dir: str, fmt: str) -> Optional[str]:
+    """子进程入口：合并一个系列"""
+    if fmt == 'epub':
+        from .epub import export_epub
+        return export_epub(series_dir, merged_filename(series_dir, fmt), _worker_index)
+    return utils.merge_series(series_dir, merged_filename(series_dir, fmt), _worker_index)
+
+
+def merge_library(config: Dict, force: bool = False, max_workers: Optional[int] = None,
+                  fmt: str = 'txt') -> Dict[str, Tuple[str, Optional[str]]]:
+    """合并下载目录中的所有系列
+
+    Args:
+        config: 配置字典
+        force: 忽略合并记录，重新合并所有系列
+        max_workers: 进程数，默认为 MERGE_WORKERS 或 CPU 核数
+        fmt: 输出格式，txt 或 epub
+
+    Returns:
+        系列目录到 (结果, 合并文件路径) 的映射，结果为 merged、skipped 或 failed
+    """
+    from .index import open_download_index
+
+    download_path = config.get('DOWNLOAD_PATH', 'novels')
+    if not os.path.isdir(download_path):
+        logging.error(f"下载目录不存在: {download_path}")
+        return {}
+    # 在主进程中完成索引的创建和升级，子进程只读取
+    index = open_download_index(config)
+    try:
+        return _merge_pending(config, download_path, index is not None, force, max_workers, fmt)
+    finally:
+        if index is not None:
+            index.close()
+
+
+def _merge_pending(config: Dict, download_path: str, use_index: bool, force: bool,
+                   max_workers: Optional[int], fmt: str) -> Dict[str, Tuple[str, Optional[str]]]:
+    """找出有变化的系列并用进程池合并，参数见 merge_library"""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from tqdm import tqdm
+
+    state = MergeState(download_path)
+
+    results = {}
+    pending = {}
+    for series_dir in find_series_dirs(download_path):
+        signature = series_signature(series_dir)
+        if not force and state.is_current(series_dir, signature, fmt):
+            results[series_dir] = (RESULT_SKIPPED, os.path.join(series_dir, merged_filename(series_dir, fmt)))
+        else:
+            pending[series_dir] = signature
+    logging.info(f"共 {len(results) + len(pending)} 个系列，{len(results)} 个未变化，{len(pending)} 个需要合并")
+    if not pending:
+        return results
+
+    workers = max(1, min(max_workers or config.get('MERGE_WORKERS') or os.cpu_count() or 1, len(pending)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(download_path, use_index, config.get('LOG_LEVEL', 'INFO'))) as executor, \
+            tqdm(total=len(pending), desc="合并进度", disable=not config.get('SHOW_PROGRESS', True)) as pbar:
+        futures = {executor.submit(_merge_worker, series_dir, fmt): series_dir for series_dir in pending}
+        for future in as_completed(futures):
+            series_dir = futures[future]
+            try:
+                output_path = future.result()
+            except Exception as e:
+                logging.error(f"合并系列失败 {series_dir}: {str(e)}")
+                output_path = None
+            if output_path:
+                results[series_dir] = (RESULT_MERGED, output_path)
+                # 每完成一个系列就写入记录，中断后再次运行只处理剩余的系列
+                state.update(series_dir, pending[series_dir], output_path, fmt)
+                state.save()
+                logging.info(f"已合并: {output_path}")
+            else:
+                results[series_dir] = (RESULT_FAILED, None)
+            pbar.update(1)
+    return results
@@ -1,12 +1,22 @@
 """主程序入口"""
 
+import argparse
+import json
 import os
+import sqlite3
 import sys
+import time
 import importlib.util
-from typing import Dict
+from typing import Dict, List, Optional
 
 from . import utils
+from .batch import RESULT_OK, parse_targets, read_targets, run_batch
 from .crawler import PixivNovelCrawler
+from .index import DownloadIndex, open_download_index
+from .epub import export_epub
+from .library import MERGE_FORMATS, RESULT_FAILED, RESULT_MERGED, RESULT_SKIPPED, merge_library
+from .search import SearchIndex
+from .watchlist import Watchlist, count_synced, failed_series, follow_series, sync_watchlist
 
 def load_config() -> Dict:
     """加载配置文件"""
@@ -19,7 +29,7 @@ def load_config() -> Dict:
     
     # 如果当前目录没有，尝试从示例配置创建
     if os.path.exists('config.example.py'):
-        print("未找到配置文件，将使用示例配置...")
+        print("未找到配置文件，将使用示例配置...", file=sys.stderr)
         spec = importlib.util.spec_from_file_location("config", "config.example.py")
         config = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(config)
@@ -41,17 +51,233 @@ def show_help():
     """显示帮助信息"""
     print("\n使用方法:")
     print("1. 下载小说：直接输入小说ID")
-    print("2. 合并系列：merge 系列目录名 [输出文件名]")
-    print("3. 退出程序：输入 q 或 quit")
+    print("2. 合并系列：merge 系列目录名 [输出文件名]；导出 EPUB：epub 系列目录名 [输出文件名]")
+    print("3. 重建下载索引：rebuild-index；合并下载目录中所有有变化的系列：merge-all")
+    print("4. 追踪系列：watch 小说ID；取消追踪：unwatch 系列ID")
+    print("5. 下载所有追踪系列的新章节：sync")
+    print("6. 继续上次中断或失败的下载：resume")
+    print("7. 全文搜索已下载的小说：search 关键词；为已下载的小说建立全文索引：reindex")
+    print("8. 按元数据筛选已下载的小说：find tag:标签 author:作者 series:系列ID since:日期 until:日期")
+    print("9. 退出程序：输入 q 或 quit")
+    print("批量下载请使用命令行：python -m pixiv_crawler.main download ID或链接... [-f 列表文件]")
     print("\n示例:")
     print("- 下载小说：23792182")
     print("- 合并系列：merge 邂逅少女与禁忌欲望")
     print("- 指定输出：merge 邂逅少女与禁忌欲望 全本.txt")
+    print("- 导出 EPUB：epub 邂逅少女与禁忌欲望")
+    print("- 合并全部：merge-all；全部导出 EPUB：merge-all epub")
+    print("- 追踪系列：watch 23792182")
+    print("- 同步更新：sync")
+    print("- 继续下载：resume")
+    print("- 全文搜索：search 魔法少女 学院")
+    print("- 筛选小说：find tag:原创 author:某作者 since:2024-01-01")
     print("- 显示帮助：help")
     print("- 退出程序：q")
 
-def main():
+def build_parser() -> argparse.ArgumentParser:
+    """命令行参数解析器，不带子命令时进入交互模式"""
+    parser = argparse.ArgumentParser(prog='pixiv_crawler', description='Pixiv 小说下载器')
+    subparsers = parser.add_subparsers(dest='command')
+
+    download = subparsers.add_parser('download', help='批量下载小说ID、小说链接或系列链接')
+    download.add_argument('targets', nargs='*', help='小说ID、小说链接或系列链接')
+    download.add_argument('-f', '--file', action='append', default=[], dest='files',
+                          help='从文件读取目标，每行一个；- 表示标准输入')
+    download.add_argument('--no-series', action='store_true', help='只下载指定的小说，不下载所在系列的其他章节')
+
+    merge = subparsers.add_parser('merge', help='合并系列')
+    merge.add_argument('series', help='系列目录名')
+    merge.add_argument('output', nargs='?', help='输出文件名')
+
+    epub = subparsers.add_parser('epub', help='将系列导出为 EPUB，每章一个文件')
+    epub.add_argument('series', help='系列目录名')
+    epub.add_argument('output', nargs='?', help='输出文件名')
+
+    merge_all = subparsers.add_parser('merge-all', help='用多个进程合并下载目录中所有有变化的系列')
+    merge_all.add_argument('--format', choices=MERGE_FORMATS, default='txt', help='输出格式，默认为 txt')
+    merge_all.add_argument('--force', action='store_true', help='忽略合并记录，重新合并所有系列')
+    merge_all.add_argument('-j', '--jobs', type=int, help='进程数，默认为 MERGE_WORKERS 或 CPU 核数')
+    merge_all.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+
+    subparsers.add_parser('sync', help='下载所有追踪系列的新章节')
+    subparsers.add_parser('rebuild-index', help='重建下载索引')
+    subparsers.add_parser('resume', help='继续上次中断或失败的下载')
+
+    search = subparsers.add_parser('search', help='全文搜索已下载的小说')
+    search.add_argument('query', nargs='+', help='关键词，多个关键词需同时匹配')
+    search.add_argument('-n', '--limit', type=int, default=20, help='最多返回的结果数')
+    search.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    subparsers.add_parser('reindex', help='为已下载的小说重建全文索引')
+
+    find = subparsers.add_parser('find', help='按标签、作者、系列、创建时间筛选已下载的小说')
+    find.add_argument('--tag', action='append', default=[], dest='tags', help='标签，可重复指定，需同时带有')
+    find.add_argument('--author', help='作者')
+    find.add_argument('--series', help='系列ID')
+    find.add_argument('--since', help='创建时间下限（含），如 2024-01-01')
+    find.add_argument('--until', help='创建时间上限（不含）')
+    find.add_argument('-n', '--limit', type=int, help='最多返回的数量')
+    find.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    return parser
+
+def run_download(crawler: PixivNovelCrawler, args: argparse.Namespace) -> int:
+    """执行批量下载，结果以 JSON 输出到标准输出
+
+    Returns:
+        退出码：全部成功为 0，有失败、无法获取章节列表的系列或无法识别的目标为 1，没有目标为 2
+    """
+    files = list(args.files)
+    if not args.targets and not files and not sys.stdin.isatty():
+        files.append('-')
+    targets, invalid = parse_targets(read_targets(args.targets, files))
+    if not targets and not invalid:
+        print("没有指定下载目标", file=sys.stderr)
+        return 2
+
+    results = run_batch(crawler, targets, with_series=not args.no_series)
+    novels = results['novels']
+    ok = sum(1 for result in novels.values() if result == RESULT_OK)
+    report = {
+        'ok': ok,
+        'failed': len(novels) - ok,
+        'invalid': invalid,
+        'novels': novels,
+        'series': results['series'],
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    series_errors = any(info.get('error') for info in report['series'].values())
+    return 0 if report['failed'] == 0 and not invalid and not series_errors else 1
+
+def get_search_index(config: Dict, search_index: Optional[SearchIndex] = None) -> Optional[SearchIndex]:
+    """获取全文索引，未启用 SEARCH_INDEX 时直接打开下载目录中的索引"""
+    if search_index is not None:
+        return search_index
+    try:
+        return SearchIndex(config['DOWNLOAD_PATH'])
+    except sqlite3.OperationalError as e:
+        print(f"无法打开全文索引，SQLite 需要支持 FTS5 trigram 分词: {str(e)}", file=sys.stderr)
+        return None
+
+def print_search_results(results: List[Dict], elapsed: float) -> None:
+    """输出搜索结果"""
+    print(f"找到 {len(results)} 条结果（{elapsed * 1000:.1f} ms）")
+    for rank, hit in enumerate(results, 1):
+        print(f"\n{rank}. {hit['title']} - {hit['author']} (ID: {hit['novel_id']})")
+        print(f"   {hit['path']}")
+        if hit['snippet']:
+            print(f"   {' '.join(hit['snippet'].split())}")
+
+# find 命令的条件前缀与 DownloadIndex.find 参数的对应关系
+FIND_FILTERS = {'tag': 'tags', 'author': 'author', 'series': 'series_id', 'since': 'since', 'until': 'until'}
+
+def parse_find_filters(text: str) -> Optional[Dict]:
+    """解析交互模式中 find 命令的条件，如 tag:原创 author:某作者，格式错误时返回 None"""
+    filters = {'tags': []}
+    for item in text.split():
+        key, sep, value = item.partition(':')
+        if not sep or key not in FIND_FILTERS or not value:
+            return None
+        if key == 'tag':
+            filters['tags'].append(value)
+        else:
+            filters[FIND_FILTERS[key]] = value
+    return filters
+
+def print_find_results(novels: List[Dict], elapsed: float) -> None:
+    """输出筛选结果"""
+    print(f"找到 {len(novels)} 篇小说（{elapsed * 1000:.1f} ms）")
+    for novel in novels:
+        print(f"\n{novel['title']} - {novel['author']} (ID: {novel['novel_id']}) {novel['create_date'] or ''}")
+        if novel['tags']:
+            print(f"   标签：{', '.join(novel['tags'])}")
+        print(f"   {novel['path']}")
+
+# 只读写下载目录的子命令，不需要 Cookie，也不创建爬虫
+LOCAL_COMMANDS = ('merge', 'epub', 'merge-all', 'rebuild-index', 'find', 'search', 'reindex')
+
+def run_command(crawler: PixivNovelCrawler, config: Dict, args: argparse.Namespace) -> int:
+    """执行需要联网的非交互子命令，返回退出码"""
+    if args.command == 'download':
+        return run_download(crawler, args)
+    if args.command == 'sync':
+        results = sync_watchlist(crawler, Watchlist(config['DOWNLOAD_PATH']))
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 1 if failed_series(results) else 0
+    if args.command == 'resume':
+        results = crawler.resume()
+        journal = crawler.journal
+        print(json.dumps({
+            'novels': results,
+            'jobs': journal.counts() if journal is not None else {},
+            'failures': journal.failures() if journal is not None else [],
+        }, ensure_ascii=False, indent=2))
+        return 0 if all(results.values()) else 1
+    return 2
+
+def print_merge_summary(results: Dict) -> None:
+    """输出整库合并的统计"""
+    counts = {result: sum(1 for r, _ in results.values() if r == result)
+              for result in (RESULT_MERGED, RESULT_SKIPPED, RESULT_FAILED)}
+    print(f"合并完成：合并 {counts[RESULT_MERGED]} 个系列，未变化跳过 {counts[RESULT_SKIPPED]} 个，"
+          f"失败 {counts[RESULT_FAILED]} 个")
+    for series_dir, (result, _) in sorted(results.items()):
+        if result == RESULT_FAILED:
+            print(f"   合并失败: {series_dir}")
+
+def run_local_command(config: Dict, args: argparse.Namespace) -> int:
+    """执行本地子命令（LOCAL_COMMANDS），返回退出码"""
+    if args.command in ('merge', 'epub'):
+        series_dir = os.path.join(config['DOWNLOAD_PATH'], args.series)
+        if not os.path.exists(series_dir):
+            print(f"系列目录不存在: {series_dir}", file=sys.stderr)
+            return 1
+        export = export_epub if args.command == 'epub' else utils.merge_series
+        output_file = export(series_dir, args.output, open_download_index(config))
+        if not output_file:
+            return 1
+        print(output_file)
+        return 0
+    if args.command == 'merge-all':
+        results = merge_library(config, force=args.force, max_workers=args.jobs, fmt=args.format)
+        if args.json:
+            report = {series_dir: {'result': result, 'output': output}
+                      for series_dir, (result, output) in results.items()}
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+        else:
+            print_merge_summary(results)
+        return 1 if any(result == RESULT_FAILED for result, _ in results.values()) else 0
+    if args.command == 'rebuild-index':
+        print(DownloadIndex(config['DOWNLOAD_PATH']).rebuild())
+        return 0
+    if args.command == 'find':
+        index = open_download_index(config) or DownloadIndex(config['DOWNLOAD_PATH'])
+        start = time.perf_counter()
+        novels = index.find(args.tags, author=args.author, series_id=args.series,
+                            since=args.since, until=args.until, limit=args.limit)
+        if args.json:
+            print(json.dumps(novels, ensure_ascii=False, indent=2))
+        else:
+            print_find_results(novels, time.perf_counter() - start)
+        return 0
+    if args.command in ('search', 'reindex'):
+        search_index = get_search_index(config)
+        if search_index is None:
+            return 1
+        if args.command == 'reindex':
+            print(search_index.rebuild())
+            return 0
+        start = time.perf_counter()
+        results = search_index.search(' '.join(args.query), args.limit)
+        if args.json:
+            print(json.dumps(results, ensure_ascii=False, indent=2))
+        else:
+            print_search_results(results, time.perf_counter() - start)
+        return 0
+    return 2
+
+def main(argv: Optional[List[str]] = None):
     """主程序入口"""
+    args = build_parser().parse_args(argv)
+
     # 加载配置
     config = load_config()
     
@@ -60,10 +286,23 @@ def main():
     
     # 创建下载目录
     os.makedirs(config.get('DOWNLOAD_PATH', 'novels'), exist_ok=True)
-    
+
+    if args.command in LOCAL_COMMANDS:
+        sys.exit(run_local_command(config, args))
+    if args.command:
+        try:
+            crawler = PixivNovelCrawler(config)
+        except ValueError:
+            sys.exit(2)
+        code = run_command(crawler, config, args)
+        if args.command in ('download', 'resume', 'sync'):
+            crawler.report()
+        sys.exit(code)
+
     try:
         # 创建爬虫实例
         crawler = PixivNovelCrawler(config)
+        watchlist = Watchlist(config['DOWNLOAD_PATH'])
         
         print("\n欢迎使用 Pixiv 小说下载器！输入 help 获取帮助。")
         
@@ -74,6 +313,62 @@ def main():
                 break
             elif cmd.lower() == 'help':
                 show_help()
+            elif cmd.lower() == 'rebuild-index':
+                # 从已下载的文件重建索引
+                index = crawler.index or DownloadIndex(config['DOWNLOAD_PATH'])
+                count = index.rebuild()
+                print(f"索引重建完成，共 {count} 篇小说")
+            elif cmd.lower().startswith('watch '):
+                novel_id = cmd[6:].strip()
+                if not novel_id.isdigit():
+                    print("无效的小说ID！")
+                    continue
+                series_id = follow_series(crawler, watchlist, novel_id)
+                if series_id:
+                    print(f"已追踪系列 {series_id}，输入 sync 下载新章节")
+            elif cmd.lower().startswith('unwatch '):
+                series_id = cmd[8:].strip()
+                if watchlist.remove(series_id):
+                    watchlist.save()
+                    print(f"已取消追踪系列 {series_id}")
+                else:
+                    print(f"系列 {series_id} 不在追踪列表中")
+            elif cmd.lower() == 'reindex':
+                search_index = get_search_index(config, crawler.search_index)
+                if search_index:
+                    print(f"全文索引重建完成，共 {search_index.rebuild()} 篇小说")
+            elif cmd.lower().startswith('search '):
+                search_index = get_search_index(config, crawler.search_index)
+                if search_index:
+                    start = time.perf_counter()
+                    results = search_index.search(cmd[7:].strip())
+                    print_search_results(results, time.perf_counter() - start)
+            elif cmd.lower() == 'find' or cmd.lower().startswith('find '):
+                filters = parse_find_filters(cmd[4:])
+                if filters is None:
+                    print("条件格式错误！示例：find tag:原创 author:某作者 since:2024-01-01")
+                    continue
+                index = crawler.index or DownloadIndex(config['DOWNLOAD_PATH'])
+                start = time.perf_counter()
+                print_find_results(index.find(**filters), time.perf_counter() - start)
+            elif cmd.lower() == 'resume':
+                results = crawler.resume()
+                failed = [nid for nid, ok in results.items() if not ok]
+                print(f"继续下载完成，共 {len(results)} 篇，失败 {len(failed)} 篇")
+                if crawler.journal is not None:
+                    for failure in crawler.journal.failures():
+                        print(f"  {failure['novel_id']}：已尝试 {failure['attempts']} 次，{failure['error'] or '未知错误'}")
+                crawler.report()
+            elif cmd.lower() == 'sync':
+                results = sync_watchlist(crawler, watchlist)
+                print(f"同步完成，共 {len(results)} 个系列，新下载 {count_synced(results)} 篇，"
+                      f"{len(failed_series(results))} 个系列有失败")
+                crawler.report()
+            elif cmd.lower() == 'merge-all' or cmd.lower().startswith('merge-all '):
+                # 并行合并所有有变化的系列：merge-all [epub] [--force]
+                options = cmd.lower().split()[1:]
+                fmt = next((option for option in options if option in MERGE_FORMATS), 'txt')
+                print_merge_summary(merge_library(config, force='--force' in options, fmt=fmt))
             elif cmd.lower().startswith('merge '):
                 # 合并系列小说
                 parts = cmd[6:].strip().split(maxsplit=1)
@@ -93,11 +388,26 @@ def main():
                 if output_filename:
                     print(f"指定输出文件名：{output_filename}")
                 
-                output_file = utils.merge_series(series_dir, output_filename)
+                output_file = utils.merge_series(series_dir, output_filename, crawler.index)
                 if output_file:
                     print(f"合并完成！文件已保存至: {output_file}")
                 else:
                     print("合并失败！")
+            elif cmd.lower().startswith('epub '):
+                # 导出 EPUB
+                parts = cmd[5:].strip().split(maxsplit=1)
+                if not parts:
+                    print("请指定系列名称！")
+                    continue
+                series_dir = os.path.join(config['DOWNLOAD_PATH'], parts[0])
+                if not os.path.exists(series_dir):
+                    print(f"系列目录不存在: {series_dir}")
+                    continue
+                output_file = export_epub(series_dir, parts[1] if len(parts) > 1 else None, crawler.index)
+                if output_file:
+                    print(f"导出完成！文件已保存至: {output_file}")
+                else:
+                    print("导出失败！")
             else:
                 # 下载小说
                 novel_id = cmd
@@ -0,0 +1,190 @@
+"""耗时统计模块
+
+记录爬取热路径各阶段（网络请求、JSON 解析、页面解析、写盘）的耗时直方图，
+以及请求数、下载字节数、重试次数和缓存命中数，用于判断瓶颈在网络、解析还是磁盘。
+统计结果可以输出为文本摘要，或导出为 JSON / Prometheus 文本格式。
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+# 阶段名称
+STAGE_REQUEST = 'request'
+STAGE_JSON = 'json_decode'
+STAGE_PARSE = 'html_parse'
+STAGE_SAVE = 'save'
+
+STAGE_LABELS = {
+    STAGE_REQUEST: '网络请求',
+    STAGE_JSON: 'JSON 解析',
+    STAGE_PARSE: '页面解析',
+    STAGE_SAVE: '写盘',
+}
+
+# 计数器名称
+COUNTER_REQUESTS = 'requests'
+COUNTER_BYTES = 'bytes_received'
+COUNTER_RETRIES = 'retries'
+COUNTER_CACHE_HITS = 'cache_hits'
+
+COUNTER_LABELS = {
+    COUNTER_REQUESTS: '请求数',
+    COUNTER_BYTES: '下载字节数',
+    COUNTER_RETRIES: '重试次数',
+    COUNTER_CACHE_HITS: '缓存命中',
+}
+
+# 直方图桶上界（秒），最后一个桶为 +Inf
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+
+class _Histogram:
+    """固定桶的耗时直方图"""
+
+    __slots__ = ('counts', 'total', 'maximum')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def quantile(self, q: float) -> float:
+        """按桶估算分位数，返回所在桶的上界（最后一个桶返回最大值）"""
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if n and seen >= target:
+                return min(bound, self.maximum)
+        return self.maximum
+
+
+class CrawlMetrics:
+    """爬取耗时统计（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """清空统计，重新开始计时"""
+        with self._lock:
+            self._histograms = {stage: _Histogram() for stage in STAGE_LABELS}
+            self._counters = dict.fromkeys(COUNTER_LABELS, 0)
+            self._started = time.perf_counter()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """记录一次阶段耗时"""
+        with self._lock:
+            self._histograms[stage].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """统计代码块耗时，出错时同样记录"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def count(self, counter: str, n: int = 1) -> None:
+        """累加计数器"""
+        with self._lock:
+            self._counters[counter] += n
+
+    def snapshot(self) -> Dict:
+        """返回当前统计数据"""
+        with self._lock:
+            stages = {}
+            for stage, hist in self._histograms.items():
+                stages[stage] = {
+                    'count': hist.count,
+                    'sum': hist.total,
+                    'max': hist.maximum,
+                    'p50': hist.quantile(0.5),
+                    'p95': hist.quantile(0.95),
+                    'buckets': list(zip(BUCKETS, hist.counts)),
+                }
+            return {
+                'elapsed': time.perf_counter() - self._started,
+                'stages': stages,
+                'counters': dict(self._counters),
+            }
+
+    def summary(self) -> str:
+        """返回便于日志输出的统计文本"""
+        data = self.snapshot()
+        lines = []
+        for stage, label in STAGE_LABELS.items():
+            s = data['stages'][stage]
+            if not s['count']:
+                continue
+            lines.append(f"{label}: {s['count']} 次，共 {s['sum']:.2f}s，平均 {s['sum'] / s['count'] * 1000:.1f}ms，"
+                         f"p50≤{s['p50'] * 1000:.1f}ms，p95≤{s['p95'] * 1000:.1f}ms，最长 {s['max'] * 1000:.1f}ms")
+        lines.append("，".join(f"{label} {data['counters'][name]}" for name, label in COUNTER_LABELS.items()))
+        busiest = max(data['stages'].items(), key=lambda item: item[1]['sum'])
+        if busiest[1]['sum'] > 0:
+            lines.append(f"耗时最多的阶段: {STAGE_LABELS[busiest[0]]}（总耗时 {data['elapsed']:.2f}s）")
+        return "\n".join(lines)
+
+    def to_json(self) -> str:
+        """导出为 JSON"""
+        data = self.snapshot()
+        for stage in data['stages'].values():
+            stage['buckets'] = [['+Inf' if bound == float('inf') else bound, n] for bound, n in stage['buckets']]
+        return json.dumps(data, ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """导出为 Prometheus 文本格式"""
+        data = self.snapshot()
+        lines = [
+            "# HELP pixiv_crawler_stage_seconds Time spent in each crawl stage.",
+            "# TYPE pixiv_crawler_stage_seconds histogram",
+        ]
+        for stage, s in data['stages'].items():
+            cumulative = 0
+            for bound, n in s['buckets']:
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'pixiv_crawler_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'pixiv_crawler_stage_seconds_sum{{stage="{stage}"}} {s["sum"]}')
+            lines.append(f'pixiv_crawler_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+        for name, value in data['counters'].items():
+            lines.append(f"# TYPE pixiv_crawler_{name}_total counter")
+            lines.append(f"pixiv_crawler_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str) -> None:
+        """导出到文件，扩展名为 .prom 时使用 Prometheus 文本格式，否则为 JSON"""
+        text = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+def report_metrics(metrics: CrawlMetrics, config: Dict) -> None:
+    """输出统计摘要，配置了 METRICS_EXPORT 时同时导出到文件"""
+    logging.info(f"耗时统计:\n{metrics.summary()}")
+    path = config.get('METRICS_EXPORT')
+    if path:
+        try:
+            metrics.export(path)
+        except OSError as e:
+            logging.error(f"导出耗时统计失败: {str(e)}")
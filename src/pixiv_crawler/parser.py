@@ -0,0 +1,165 @@
+"""页面与接口数据解析模块
+
+同步与异步爬虫共用的解析逻辑，只处理已获取的数据，不发送请求。
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional, Tuple, Union
+
+from .preload import extract_preload_data
+
+
+# 下载目标：小说ID、小说链接、系列链接
+_NOVEL_URL = re.compile(r'pixiv\.net/novel/show\.php\?(?:[^#\s]*&)?id=(\d+)')
+_SERIES_URL = re.compile(r'pixiv\.net/novel/series/(\d+)')
+
+
+def parse_target(target: str) -> Optional[Tuple[str, str]]:
+    """解析下载目标
+
+    Returns:
+        ('novel', 小说ID) 或 ('series', 系列ID)，无法识别时返回 None
+    """
+    target = target.strip()
+    if target.isdigit():
+        return 'novel', target
+    match = _NOVEL_URL.search(target)
+    if match:
+        return 'novel', match.group(1)
+    match = _SERIES_URL.search(target)
+    if match:
+        return 'series', match.group(1)
+    return None
+
+
+def parse_cookie(cookie: str) -> Dict[str, str]:
+    """解析浏览器复制的 Cookie 字符串"""
+    cookies = {}
+    for cookie_pair in cookie.split(';'):
+        if not cookie_pair.strip():
+            continue
+        name, value = cookie_pair.strip().split('=', 1)
+        cookies[name] = value
+    return cookies
+
+
+def extract_page_content(html: str, novel_id: Union[str, int]) -> str:
+    """从小说页面中提取正文
+
+    Args:
+        html: show.php 页面内容
+        novel_id: 小说ID
+
+    Returns:
+        小说正文，提取失败时返回空字符串
+    """
+    content = ""
+
+    # 尝试从预加载数据中获取内容
+    data = extract_preload_data(html)
+    if data:
+        try:
+            if data.get('novel') and data['novel'].get(str(novel_id)):
+                content = data['novel'][str(novel_id)].get('content', '')
+        except:
+            pass
+
+    # 如果预加载数据中没有内容，尝试从页面元素中获取
+    if not content:
+        from bs4 import BeautifulSoup  # 只在回退解析时使用，避免启动时加载
+        soup = BeautifulSoup(html, 'html.parser')
+        content_div = soup.find('div', {'id': 'novel-content'})
+        if content_div:
+            content = content_div.get_text('\n', strip=True)
+
+    return content
+
+
+def build_novel_info(novel_id: Union[str, int], novel: Dict, content: str) -> Dict:
+    """根据 /ajax/novel/{id} 的 body 和正文构造小说信息"""
+    # 检查是否为系列作品
+    series_info = None
+    if novel.get('seriesNavData'):
+        series = novel['seriesNavData']
+        series_info = {
+            'id': series['seriesId'],
+            'title': series['title'],
+            'order': series.get('order'),
+            'nav': series
+        }
+        logging.info(f"检测到系列作品: {series['title']}")
+
+    # 获取标签
+    tags = []
+    if novel.get('tags'):
+        if isinstance(novel['tags'], list):
+            tags = [tag['tag'] for tag in novel['tags']]
+        elif isinstance(novel['tags'], dict) and novel['tags'].get('tags'):
+            tags = [tag['tag'] for tag in novel['tags']['tags']]
+
+    return {
+        'id': str(novel_id),
+        'title': novel['title'],
+        'author': novel['userName'],
+        'content': content,
+        'series_info': series_info,
+        'create_date': novel.get('createDate', ''),
+        'tags': tags
+    }
+
+
+def parse_series_page(series_data: Dict, last_order: int = 0) -> Tuple[List[Dict], Optional[int]]:
+    """解析系列接口的一页章节
+
+    Args:
+        series_data: /ajax/novel/series/{id} 的响应数据
+        last_order: 本页请求的 last_order，章节缺少序号时据此推算
+
+    Returns:
+        (章节列表, 系列章节总数)，章节为 {'id': ..., 'order': ...}；
+        接口未提供总数时总数为 None
+    """
+    body = series_data.get('body') or {}
+    total = body.get('total', body.get('publishedContentCount'))
+    items = (body.get('page') or {}).get('series') or []
+
+    chapters = []
+    for position, novel in enumerate(items, last_order + 1):
+        if novel.get('id'):
+            chapters.append({
+                'id': str(novel['id']),
+                'order': int(novel.get('order') or position)
+            })
+    return chapters, int(total) if total is not None else None
+
+
+def parse_series_nav(series_nav: Dict, current_id: Optional[Union[str, int]] = None) -> List[str]:
+    """系列接口无数据时，从 seriesNavData 中解析相邻章节ID
+
+    Args:
+        series_nav: 小说的 seriesNavData
+        current_id: 当前小说ID
+
+    Returns:
+        按ID排序的章节ID列表
+    """
+    novels = []
+    # 添加当前小说
+    if current_id:
+        novels.append(str(current_id))
+
+    # 获取前面的章节
+    current = series_nav
+    while current.get('prev') and current['prev'].get('id'):
+        novels.append(str(current['prev']['id']))
+        current = current['prev']
+
+    # 获取后面的章节
+    current = series_nav
+    while current.get('next') and current['next'].get('id'):
+        novels.append(str(current['next']['id']))
+        current = current['next']
+
+    # 去重并排序
+    return sorted(set(novels), key=lambda x: int(x))
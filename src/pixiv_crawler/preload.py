@@ -0,0 +1,88 @@
+"""预加载数据提取模块
+
+show.php 页面把小说数据以 JSON 形式放在 ``<meta id="meta-preload-data">``
+的 content 属性中。这里直接定位该标签并只解析它的属性，避免为整页构建
+DOM 树；定位失败时依次回退到 lxml（如已安装）和 BeautifulSoup。
+"""
+
+import html
+import json
+import logging
+import re
+from typing import Dict, Optional
+
+
+# 定位 id 属性
+_PRELOAD_ID = re.compile(r'''\bid\s*=\s*(?:"meta-preload-data"|'meta-preload-data'|meta-preload-data(?=[\s/>]))''')
+# 逐个匹配标签属性：name、name=value、name="value"、name='value'
+_ATTRIBUTE = re.compile(r'''\s*([^\s"'=<>/]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?''')
+_TAG_END = re.compile(r'\s*/?>')
+
+
+def _scan_tag_attributes(page: str, start: int) -> Optional[Dict[str, str]]:
+    """从标签起始位置 ``<meta`` 开始逐个读取属性，直到标签结束"""
+    pos = start + len('<meta')
+    attributes = {}
+    while True:
+        end = _TAG_END.match(page, pos)
+        if end:
+            return attributes
+        match = _ATTRIBUTE.match(page, pos)
+        if not match or match.end() == pos:
+            return None
+        value = next((v for v in match.group(2, 3, 4) if v is not None), '')
+        attributes[match.group(1).lower()] = value
+        pos = match.end()
+
+
+def _scan_preload_content(page: str) -> Optional[str]:
+    """定向扫描出预加载标签的 content 属性（已反转义）"""
+    for match in _PRELOAD_ID.finditer(page):
+        start = page.rfind('<', 0, match.start())
+        if start < 0 or not page.startswith('<meta', start):
+            continue
+        attributes = _scan_tag_attributes(page, start)
+        if attributes and attributes.get('id') == 'meta-preload-data' and 'content' in attributes:
+            return html.unescape(attributes['content'])
+    return None
+
+
+def _lxml_preload_content(page: str) -> Optional[str]:
+    """使用 lxml 解析页面获取预加载数据"""
+    try:
+        import lxml.html
+    except ImportError:  # lxml 为可选依赖，只在定向扫描失败时加载
+        return None
+    try:
+        nodes = lxml.html.fromstring(page).xpath('//meta[@id="meta-preload-data"]/@content')
+    except Exception:
+        return None
+    return str(nodes[0]) if nodes else None
+
+
+def _soup_preload_content(page: str) -> Optional[str]:
+    """使用 BeautifulSoup 解析整页获取预加载数据"""
+    from bs4 import BeautifulSoup
+
+    tag = BeautifulSoup(page, 'html.parser').find('meta', {'id': 'meta-preload-data'})
+    return tag.get('content') if tag else None
+
+
+def extract_preload_data(page: str) -> Optional[Dict]:
+    """提取并解码 show.php 页面中的预加载数据
+
+    Args:
+        page: 页面 HTML
+
+    Returns:
+        预加载 JSON 数据，页面中没有时返回 None
+    """
+    for extractor in (_scan_preload_content, _lxml_preload_content, _soup_preload_content):
+        raw = extractor(page)
+        if raw is None:
+            continue
+        try:
+            return json.loads(raw)
+        except ValueError:
+            logging.debug(f"预加载数据解析失败: {extractor.__name__}")
+    return None
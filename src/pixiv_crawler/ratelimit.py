@@ -0,0 +1,64 @@
+"""请求限速模块"""
+
+import threading
+import time
+from typing import Dict
+
+
+class RateLimiter:
+    """令牌桶限速器
+
+    多个线程共享同一个限速器，整体请求速率不超过 rate 次/秒，
+    允许最多 burst 个请求的突发。
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """初始化限速器
+
+        Args:
+            rate: 每秒补充的令牌数，小于等于 0 表示不限速
+            burst: 令牌桶容量
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'RateLimiter':
+        """根据配置创建限速器，未设置 RATE_LIMIT 时按 SLEEP_TIME 推算"""
+        rate = config.get('RATE_LIMIT')
+        if rate is None:
+            sleep_time = config.get('SLEEP_TIME', 1)
+            rate = 1 / sleep_time if sleep_time > 0 else 0
+        return cls(rate, config.get('RATE_BURST', 1))
+
+    def set_rate(self, rate: float) -> None:
+        """调整速率，已积累的令牌保持不变"""
+        with self._lock:
+            now = time.monotonic()
+            if self.rate > 0:
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self.rate = rate
+
+    def reserve(self) -> float:
+        """预订一个令牌，返回需要等待的秒数"""
+        if self.rate <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """获取一个令牌，必要时阻塞等待"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,220 @@
+"""全文搜索模块
+
+在下载目录中用 SQLite FTS5 维护已下载小说的全文索引，覆盖标题、作者、
+标签和正文。使用 trigram 分词，中日文无需分词词典，任意三个字以上的
+片段都能走索引；不足三个字的关键词退化为逐行匹配。
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Union
+
+SEARCH_INDEX_FILENAME = '.search_index.sqlite'
+
+# trigram 分词能使用索引的最短关键词长度
+MIN_TERM_LENGTH = 3
+
+# 重建索引时每批提交的小说数
+REBUILD_BATCH_SIZE = 500
+
+# bm25 列权重：标题、作者、标签、正文
+_WEIGHTS = (10.0, 5.0, 5.0, 1.0)
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS novels USING fts5(
+    path UNINDEXED,
+    title,
+    author,
+    tags,
+    content,
+    tokenize = 'trigram'
+);
+"""
+
+
+class SearchIndex:
+    """已下载小说的全文索引
+
+    以小说ID作为 rowid，路径以相对下载目录的形式保存。同一实例可在多个线程间共享。
+    """
+
+    def __init__(self, download_path: str):
+        """打开（必要时创建）下载目录中的全文索引
+
+        Args:
+            download_path: 下载目录
+
+        Raises:
+            sqlite3.OperationalError: SQLite 不支持 FTS5 或 trigram 分词（需要 3.34 以上）
+        """
+        self.download_path = download_path
+        os.makedirs(download_path, exist_ok=True)
+        self.db_path = os.path.join(download_path, SEARCH_INDEX_FILENAME)
+        self.created = not os.path.exists(self.db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def close(self) -> None:
+        """关闭索引"""
+        with self._lock:
+            self._conn.close()
+
+    def _relpath(self, path: str) -> str:
+        """转换为相对下载目录的路径"""
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.download_path))
+
+    def contains(self, novel_id: str) -> bool:
+        """小说是否已在索引中"""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM novels WHERE rowid = ?", (int(novel_id),)).fetchone()
+        return row is not None
+
+    def add(self, novel_id: str, path: str, title: str, author: str,
+            tags: Union[str, List[str]], content: str) -> None:
+        """写入或替换一篇小说
+
+        Args:
+            novel_id: 小说ID
+            path: 小说文件路径
+            title: 标题
+            author: 作者
+            tags: 标签列表，或以逗号分隔的标签文本
+            content: 正文
+        """
+        with self._lock:
+            self._insert(novel_id, path, title, author, tags, content)
+            self._conn.commit()
+
+    def _insert(self, novel_id: str, path: str, title: str, author: str,
+                tags: Union[str, List[str]], content: str) -> None:
+        """写入一篇小说，不提交事务；调用方需持有锁"""
+        if not isinstance(tags, str):
+            tags = ', '.join(tags)
+        self._conn.execute("DELETE FROM novels WHERE rowid = ?", (int(novel_id),))
+        self._conn.execute(
+            "INSERT INTO novels (rowid, path, title, author, tags, content) VALUES (?, ?, ?, ?, ?, ?)",
+            (int(novel_id), self._relpath(path), title or '', author or '', tags or '', content)
+        )
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """搜索小说，按相关度排序
+
+        多个关键词以空白分隔，需要同时匹配；关键词可出现在标题、作者、标签或正文中。
+
+        Returns:
+            结果列表，包含 novel_id、path（绝对路径）、title、author、tags、snippet
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        indexed = [term for term in terms if len(term) >= MIN_TERM_LENGTH]
+        short = [term for term in terms if len(term) < MIN_TERM_LENGTH]
+
+        conditions = []
+        params = []
+        if indexed:
+            conditions.append("novels MATCH ?")
+            params.append(' AND '.join('"{}"'.format(term.replace('"', '""')) for term in indexed))
+        for term in short:
+            pattern = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            conditions.append("(" + " OR ".join(f"{column} LIKE ? ESCAPE '\\'"
+                                                for column in ('title', 'author', 'tags', 'content')) + ")")
+            params.extend([pattern] * 4)
+
+        # 排序与摘要函数只能用于全文匹配查询
+        if indexed:
+            rank = f"bm25(novels, 0, {', '.join(map(str, _WEIGHTS))})"
+            snippet = "snippet(novels, 4, '[', ']', '…', 16)"
+        else:
+            rank, snippet = "rowid", "''"
+        sql = (f"SELECT CAST(rowid AS TEXT) AS novel_id, path, title, author, tags, "
+               f"{snippet} AS snippet FROM novels "
+               f"WHERE {' AND '.join(conditions)} ORDER BY {rank} LIMIT ?")
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        results = []
+        for row in rows:
+            result = dict(row)
+            result['path'] = os.path.join(self.download_path, result['path'])
+            if not indexed:
+                result['snippet'] = _snippet(self._read_content(result['novel_id']), short[0])
+            results.append(result)
+        return results
+
+    def _read_content(self, novel_id: str) -> str:
+        with self._lock:
+            row = self._conn.execute("SELECT content FROM novels WHERE rowid = ?", (int(novel_id),)).fetchone()
+        return row['content'] if row else ''
+
+    def rebuild(self) -> int:
+        """扫描下载目录中已有的小说文件，重建全文索引
+
+        Returns:
+            写入索引的小说数量
+        """
+        from .utils import is_novel_file, read_novel_file
+
+        with self._lock:
+            self._conn.execute("DELETE FROM novels")
+            self._conn.commit()
+
+        count = 0
+        for root, _, files in os.walk(self.download_path):
+            for filename in files:
+                if not is_novel_file(filename):
+                    continue
+                filepath = os.path.join(root, filename)
+                try:
+                    header, content = read_novel_file(filepath)
+                except Exception as e:
+                    logging.warning(f"读取文件失败 {filepath}: {str(e)}")
+                    continue
+                if not header.get('id'):
+                    continue
+                with self._lock:
+                    self._insert(header['id'], filepath, header.get('title'), header.get('author'),
+                                 header.get('tags', ''), content)
+                    count += 1
+                    if count % REBUILD_BATCH_SIZE == 0:
+                        self._conn.commit()
+
+        with self._lock:
+            self._conn.commit()
+            self._conn.execute("INSERT INTO novels (novels) VALUES ('optimize')")
+            self._conn.commit()
+        logging.info(f"全文索引重建完成，共 {count} 篇小说")
+        return count
+
+
+def _snippet(content: str, term: str, width: int = 16) -> str:
+    """截取关键词附近的正文，格式与 FTS5 snippet 相同"""
+    pos = content.find(term)
+    if pos < 0:
+        return ''
+    start = max(0, pos - width)
+    end = pos + len(term) + width
+    return (('…' if start > 0 else '') + content[start:pos] + '[' + term + ']'
+            + content[pos + len(term):end] + ('…' if end < len(content) else ''))
+
+
+def open_search_index(config: Dict) -> Optional[SearchIndex]:
+    """根据配置打开全文索引，SEARCH_INDEX 为 False 或 SQLite 不支持时返回 None"""
+    if not config.get('SEARCH_INDEX', False):
+        return None
+    try:
+        search_index = SearchIndex(config.get('DOWNLOAD_PATH', 'novels'))
+    except sqlite3.OperationalError as e:
+        logging.error(f"无法创建全文索引，SQLite 需要支持 FTS5 trigram 分词: {str(e)}")
+        return None
+    if search_index.created:
+        logging.info("已创建全文索引，输入 reindex 可为已下载的小说建立索引")
+    return search_index
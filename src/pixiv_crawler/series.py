@@ -0,0 +1,243 @@
+"""系列章节枚举模块
+
+按 last_order 分页获取系列的全部章节，已知章节总数时并发请求剩余分页。
+章节目录缓存在下载目录中，缓存有效期内不发送请求；过期后只从缓存的
+末尾继续获取，检查已追踪的系列通常只需要一次请求。
+
+分页与缓存逻辑只在 _page_plan 中实现一次，它不发送请求，只给出下一批要获取的
+分页；list_series_chapters 和 async_list_series_chapters 分别用线程池和
+asyncio 执行请求，供同步和异步爬虫共用。
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Generator, Iterable, List, Optional, Tuple
+
+from .parser import parse_series_page
+
+CACHE_DIRNAME = '.series_cache'
+
+# 一页的解析结果：(章节列表, 章节总数)
+Page = Tuple[List[Dict], Optional[int]]
+
+
+def series_page_url(base_url: str, series_id: str, last_order: int, limit: int) -> str:
+    """构造系列分页接口地址"""
+    return f"{base_url}/ajax/novel/series/{series_id}?limit={limit}&last_order={last_order}&order_by=asc"
+
+
+def merge_chapters(*pages: Iterable[Dict]) -> List[Dict]:
+    """合并多页章节，按ID去重并按序号排序"""
+    chapters = {}
+    for page in pages:
+        for chapter in page:
+            chapters[chapter['id']] = chapter
+    return sorted(chapters.values(), key=lambda c: (c['order'], int(c['id'])))
+
+
+def remaining_offsets(start: int, total: int, step: int) -> List[int]:
+    """已知总数时，计算剩余分页的 last_order"""
+    return list(range(start, total, step)) if step > 0 else []
+
+
+class SeriesCache:
+    """系列章节目录缓存，每个系列一个 JSON 文件"""
+
+    def __init__(self, download_path: str, ttl: float):
+        """初始化缓存
+
+        Args:
+            download_path: 下载目录，缓存保存在其中的 .series_cache 目录
+            ttl: 缓存有效期（秒）
+        """
+        self.cache_dir = os.path.join(download_path, CACHE_DIRNAME)
+        self.ttl = ttl
+
+    def _path(self, series_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{series_id}.json")
+
+    def load(self, series_id: str) -> Optional[Dict]:
+        """读取缓存，不存在或损坏时返回 None"""
+        try:
+            with open(self._path(series_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry: Dict) -> bool:
+        """缓存是否仍在有效期内"""
+        return time.time() - entry.get('fetched_at', 0) < self.ttl
+
+    def save(self, series_id: str, chapters: List[Dict], total: Optional[int]) -> None:
+        """写入缓存"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._path(series_id) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'series_id': series_id,
+                'fetched_at': time.time(),
+                'total': total,
+                'chapters': chapters
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(series_id))
+
+
+def open_series_cache(config: Dict) -> Optional[SeriesCache]:
+    """根据配置创建系列缓存，SERIES_CACHE_TTL 为 0 时不缓存"""
+    ttl = config.get('SERIES_CACHE_TTL', 3600)
+    if not ttl:
+        return None
+    return SeriesCache(config.get('DOWNLOAD_PATH', 'novels'), ttl)
+
+
+def _page_plan(series_id: str, cache: Optional[SeriesCache], refresh: bool,
+               revalidate: bool) -> Generator[List[int], List[Page], List[Dict]]:
+    """系列目录的分页计划
+
+    每次产出一批需要获取的分页（last_order 列表，同一批可以并发请求），
+    接收对应的解析结果，最后返回按序号排序的全部章节。请求失败时由调用方
+    用 throw 传入异常。
+    """
+    entry = None if refresh or cache is None else cache.load(series_id)
+    if entry and not revalidate and cache.is_fresh(entry):
+        logging.info(f"使用缓存的系列目录: {series_id}")
+        return entry['chapters']
+
+    cached = entry['chapters'] if entry else []
+    start = len(cached)
+    try:
+        (first, total), = yield [start]
+    except Exception:
+        if cached:
+            logging.warning(f"获取系列目录失败，使用过期缓存: {series_id}")
+            return cached
+        raise
+
+    if cached and total is not None and total < start:
+        # 章节被删除，缓存的偏移量已失效
+        return (yield from _page_plan(series_id, cache, True, False))
+
+    pages = [cached, first]
+    step = len(first)
+    if step and total is not None:
+        # 已知总数，并发获取剩余分页
+        offsets = remaining_offsets(start + step, total, step)
+        if offsets:
+            results = yield offsets
+            pages.extend(chapters for chapters, _ in results)
+    elif step:
+        # 总数未知，逐页获取直到没有更多章节
+        last_order = start + step
+        while True:
+            (chapters, _), = yield [last_order]
+            if not chapters:
+                break
+            pages.append(chapters)
+            last_order += len(chapters)
+            if len(chapters) < step:
+                break
+
+    chapters = merge_chapters(*pages)
+    if cache is not None and chapters:
+        cache.save(series_id, chapters, total)
+    return chapters
+
+
+def list_series_chapters(fetch_page: Callable[[str, int], Page], series_id: str,
+                         cache: Optional[SeriesCache] = None, refresh: bool = False,
+                         revalidate: bool = False, max_workers: int = 1) -> List[Dict]:
+    """获取系列全部章节，同一批分页用线程池并发请求
+
+    Args:
+        fetch_page: 请求并解析一页的函数，参数为系列ID和 last_order
+        series_id: 系列ID
+        cache: 章节目录缓存
+        refresh: 忽略缓存，重新获取完整目录
+        revalidate: 忽略缓存有效期，从缓存末尾检查新章节
+        max_workers: 并发请求分页的线程数
+
+    Returns:
+        按序号排序的章节列表，章节为 {'id': ..., 'order': ...}
+    """
+    def fetch_pages(offsets: List[int]) -> List[Page]:
+        if len(offsets) == 1 or max_workers <= 1:
+            return [fetch_page(series_id, offset) for offset in offsets]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(offsets))) as executor:
+            return list(executor.map(lambda offset: fetch_page(series_id, offset), offsets))
+
+    series_id = str(series_id)
+    plan = _page_plan(series_id, cache, refresh, revalidate)
+    try:
+        offsets = next(plan)
+        while True:
+            try:
+                results = fetch_pages(offsets)
+            except Exception as e:
+                offsets = plan.throw(e)
+            else:
+                offsets = plan.send(results)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def async_list_series_chapters(fetch_page: Callable[[str, int], Awaitable[Page]], series_id: str,
+                                     cache: Optional[SeriesCache] = None, refresh: bool = False,
+                                     revalidate: bool = False) -> List[Dict]:
+    """list_series_chapters 的异步版本，同一批分页用 asyncio.gather 并发请求"""
+    import asyncio
+
+    series_id = str(series_id)
+    plan = _page_plan(series_id, cache, refresh, revalidate)
+    try:
+        offsets = next(plan)
+        while True:
+            try:
+                results = await asyncio.gather(*(fetch_page(series_id, offset) for offset in offsets))
+            except Exception as e:
+                offsets = plan.throw(e)
+            else:
+                offsets = plan.send(results)
+    except StopIteration as stop:
+        return stop.value
+
+
+class SeriesEnumerator:
+    """系列章节分页枚举器"""
+
+    def __init__(self, fetch_json: Callable[[str], Optional[Dict]], base_url: str,
+                 page_size: int = 500, max_workers: int = 1, cache: Optional[SeriesCache] = None):
+        """初始化枚举器
+
+        Args:
+            fetch_json: 请求地址并返回 JSON 数据的函数
+            base_url: 站点地址
+            page_size: 每页请求的章节数
+            max_workers: 并发请求分页的线程数
+            cache: 章节目录缓存
+        """
+        self.fetch_json = fetch_json
+        self.base_url = base_url
+        self.page_size = page_size
+        self.max_workers = max(1, max_workers)
+        self.cache = cache
+
+    def _fetch_page(self, series_id: str, last_order: int):
+        data = self.fetch_json(series_page_url(self.base_url, series_id, last_order, self.page_size))
+        return parse_series_page(data or {}, last_order)
+
+    def list_chapters(self, series_id: str, refresh: bool = False, revalidate: bool = False) -> List[Dict]:
+        """获取系列全部章节
+
+        Args:
+            series_id: 系列ID
+            refresh: 忽略缓存，重新获取完整目录
+            revalidate: 忽略缓存有效期，从缓存末尾检查新章节
+
+        Returns:
+            按序号排序的章节列表，章节为 {'id': ..., 'order': ...}
+        """
+        return list_series_chapters(self._fetch_page, series_id, self.cache, refresh, revalidate,
+                                    self.max_workers)
@@ -0,0 +1,130 @@
+"""多账号会话池模块
+
+从配置中加载多个账号的 Cookie，每个账号有独立的 requests.Session（连接池）、
+限速器和限流控制器。请求分配给当前负载最低的可用账号，登录失效的账号
+自动移出轮换，总吞吐量随账号数量线性增长。
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Collection, Dict, Iterator, List, Mapping
+
+from .parser import parse_cookie
+from .ratelimit import RateLimiter
+from .throttle import ThrottleController
+
+
+def load_cookies(config: Dict) -> List[str]:
+    """读取配置中的 Cookie：COOKIE 与 COOKIES 列表合并去重，保持顺序"""
+    cookies = [config.get('COOKIE')] + list(config.get('COOKIES') or [])
+    return list(dict.fromkeys(cookie.strip() for cookie in cookies if cookie and cookie.strip()))
+
+
+def check_cookies(config: Dict) -> List[str]:
+    """检查配置中的 Cookie，不创建会话
+
+    Raises:
+        ValueError: 没有设置 Cookie，或 Cookie 格式错误
+    """
+    cookies = load_cookies(config)
+    if not cookies:
+        raise ValueError("请先设置 COOKIE！")
+    try:
+        for cookie in cookies:
+            parse_cookie(cookie)
+    except ValueError as e:
+        raise ValueError(f"Cookie 格式错误: {str(e)}")
+    return cookies
+
+
+class Account:
+    """一个登录账号及其独立的连接池和请求预算"""
+
+    def __init__(self, name: str, cookie: str, config: Dict, headers: Mapping[str, str], pool_size: int):
+        """创建账号会话
+
+        Args:
+            name: 账号名称，用于日志
+            cookie: 浏览器复制的 Cookie 字符串
+            config: 配置字典，RATE_LIMIT 等限速设置对每个账号单独生效
+            headers: 请求头
+            pool_size: 连接池大小
+        """
+        import requests
+
+        self.name = name
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        for key, value in parse_cookie(cookie).items():
+            self.session.cookies.set(key, value)
+
+        self.rate_limiter = RateLimiter.from_config(config)
+        self.throttle = ThrottleController(self.rate_limiter, config)
+        self.healthy = True
+        self.in_flight = 0
+        self.requests = 0
+
+
+class SessionPool:
+    """账号会话池（线程安全）"""
+
+    def __init__(self, accounts: List[Account]):
+        self.accounts = accounts
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict, headers: Mapping[str, str], pool_size: int) -> 'SessionPool':
+        """根据配置创建会话池
+
+        Raises:
+            ValueError: 没有设置 Cookie，或 Cookie 格式错误
+        """
+        cookies = check_cookies(config)
+        return cls([Account(f"账号{i}", cookie, config, headers, pool_size)
+                    for i, cookie in enumerate(cookies, 1)])
+
+    @contextmanager
+    def lease(self, exclude: Collection[Account] = ()) -> Iterator[Account]:
+        """借出当前负载最低的可用账号，用完自动归还
+
+        Args:
+            exclude: 不参与分配的账号
+
+        Raises:
+            ValueError: 没有可用的账号
+        """
+        with self._lock:
+            healthy = [account for account in self.accounts if account.healthy and account not in exclude]
+            if not healthy:
+                raise ValueError("没有可用的账号，所有账号的登录均已失效")
+            account = min(healthy, key=lambda a: (a.in_flight, a.throttle.pause_remaining(), a.requests))
+            account.in_flight += 1
+            account.requests += 1
+        try:
+            yield account
+        finally:
+            with self._lock:
+                account.in_flight -= 1
+
+    def retire(self, account: Account, reason: str) -> None:
+        """将账号移出轮换"""
+        with self._lock:
+            if not account.healthy:
+                return
+            account.healthy = False
+            remaining = sum(1 for a in self.accounts if a.healthy)
+        logging.warning(f"{account.name} 已停用（{reason}），剩余 {remaining} 个可用账号")
+
+    def has_other(self, exclude: Collection[Account]) -> bool:
+        """除 exclude 外是否还有可用账号"""
+        with self._lock:
+            return any(account.healthy and account not in exclude for account in self.accounts)
+
+    def summary(self) -> str:
+        """返回便于日志输出的各账号请求统计"""
+        with self._lock:
+            return "，".join(f"{a.name} {a.requests} 次{'' if a.healthy else '（已停用）'}" for a in self.accounts)
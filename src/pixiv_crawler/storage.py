@@ -0,0 +1,99 @@
+"""小说存储格式模块
+
+章节文件可以保存为纯文本（.txt）、gzip（.txt.gz）或 zstd（.txt.zst，
+需要安装 zstandard）。读取时按扩展名自动识别格式并流式解压，
+同一个目录中可以混合存在不同格式的文件。
+"""
+
+import gzip
+import io
+from typing import Dict, TextIO
+
+try:
+    import zstandard
+except ImportError:  # zstandard 为可选依赖
+    zstandard = None
+
+
+class TextStorage:
+    """纯文本存储"""
+
+    name = 'txt'
+    suffix = '.txt'
+
+    def encode(self, data: str) -> bytes:
+        """将文件内容编码为写入磁盘的字节"""
+        return data.encode('utf-8')
+
+    def open_text(self, path: str) -> TextIO:
+        """以文本流打开文件"""
+        return open(path, 'r', encoding='utf-8')
+
+
+class GzipStorage(TextStorage):
+    """gzip 压缩存储"""
+
+    name = 'gzip'
+    suffix = '.txt.gz'
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def encode(self, data: str) -> bytes:
+        return gzip.compress(data.encode('utf-8'), compresslevel=self.level, mtime=0)
+
+    def open_text(self, path: str) -> TextIO:
+        return gzip.open(path, 'rt', encoding='utf-8')
+
+
+class ZstdStorage(TextStorage):
+    """zstd 压缩存储"""
+
+    name = 'zstd'
+    suffix = '.txt.zst'
+
+    def __init__(self, level: int = 10):
+        if zstandard is None:
+            raise ImportError("zstd 存储需要安装 zstandard：pip install zstandard")
+        self.level = level
+
+    def encode(self, data: str) -> bytes:
+        return zstandard.ZstdCompressor(level=self.level).compress(data.encode('utf-8'))
+
+    def open_text(self, path: str) -> TextIO:
+        raw = open(path, 'rb')
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8')
+
+
+STORAGES = {
+    TextStorage.name: TextStorage,
+    GzipStorage.name: GzipStorage,
+    ZstdStorage.name: ZstdStorage,
+}
+
+# 按扩展名识别格式，较长的扩展名在前
+NOVEL_SUFFIXES = (ZstdStorage.suffix, GzipStorage.suffix, TextStorage.suffix)
+
+
+def get_storage(config: Dict) -> TextStorage:
+    """根据 STORAGE_FORMAT 配置创建存储格式"""
+    name = config.get('STORAGE_FORMAT', TextStorage.name)
+    if name not in STORAGES:
+        raise ValueError(f"未知的存储格式: {name}（可选 {', '.join(STORAGES)}）")
+    level = config.get('STORAGE_LEVEL')
+    return STORAGES[name]() if level is None or name == TextStorage.name else STORAGES[name](level)
+
+
+def storage_for_path(path: str) -> TextStorage:
+    """按文件扩展名获取对应的存储格式"""
+    if path.endswith(ZstdStorage.suffix):
+        return ZstdStorage()
+    if path.endswith(GzipStorage.suffix):
+        return GzipStorage()
+    return TextStorage()
+
+
+def open_novel(path: str) -> TextIO:
+    """以文本流打开任意格式的小说文件"""
+    return storage_for_path(path).open_text(path)
@@ -0,0 +1,148 @@
+"""自适应限流模块
+
+会话池中的每个账号有自己的限速器和限流控制器，使用该账号的请求共享它们：
+
+- 按状态码区分可重试（429、5xx、网络错误）与不可重试（404 等）的失败
+- 优先遵循服务器的 Retry-After，否则使用带抖动的指数退避
+- 某个账号收到 429 时，使用该账号的线程一起暂停，并按 AIMD（加性增、乘性减）
+  调整该账号的请求速率；其他账号不受影响
+"""
+
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, Mapping, Optional
+
+from .ratelimit import RateLimiter
+
+# 响应分类
+OK = 'ok'
+THROTTLED = 'throttled'        # 429
+SERVER_ERROR = 'server_error'  # 5xx
+CLIENT_ERROR = 'client_error'  # 其他 4xx，不重试
+NETWORK_ERROR = 'network_error'
+
+RETRYABLE = (THROTTLED, SERVER_ERROR, NETWORK_ERROR)
+
+
+def classify(status_code: Optional[int]) -> str:
+    """按状态码分类，None 表示网络错误"""
+    if status_code is None:
+        return NETWORK_ERROR
+    if status_code == 429:
+        return THROTTLED
+    if status_code == 408 or status_code >= 500:
+        return SERVER_ERROR
+    if status_code >= 400:
+        return CLIENT_ERROR
+    return OK
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """解析 Retry-After 头（秒数或 HTTP 日期），返回需要等待的秒数"""
+    value = headers.get('Retry-After') if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ThrottleController:
+    """一个账号的重试与限流控制器，由使用该账号的所有线程共享"""
+
+    def __init__(self, rate_limiter: RateLimiter, config: Dict):
+        """初始化控制器
+
+        Args:
+            rate_limiter: 该账号的限速器，其速率由本控制器调整
+            config: 配置字典
+        """
+        self.rate_limiter = rate_limiter
+        self.base_delay = config.get('RETRY_DELAY', 2)
+        self.max_delay = config.get('RETRY_MAX_DELAY', 60)
+        # 速率上限：默认不超过配置的 RATE_LIMIT，未限速时不设上限
+        self.max_rate = config.get('RATE_LIMIT_MAX', rate_limiter.rate if rate_limiter.rate > 0 else float('inf'))
+        self.min_rate = config.get('RATE_LIMIT_MIN', 0.1)
+        self.rate_increase = config.get('RATE_INCREASE', 0.05)
+        self.rate_decrease = config.get('RATE_DECREASE', 0.5)
+        self.fallback_rate = config.get('THROTTLE_FALLBACK_RATE', 1.0)
+        # 同一次拥塞中多个并发请求一起失败，窗口内只降低一次速率
+        self.decrease_window = config.get('RATE_DECREASE_WINDOW', 2.0)
+        # 原本不限速且未设置 RATE_LIMIT_MAX 时，连续成功这么多次后恢复不限速
+        self.unlimited = rate_limiter.rate <= 0 and self.max_rate == float('inf')
+        self.recovery_successes = config.get('THROTTLE_RECOVERY_SUCCESSES', 50)
+
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._last_decrease = float('-inf')
+        self._success_streak = 0
+        self._stats = Counter()
+
+    def pause_remaining(self) -> float:
+        """该账号暂停剩余的秒数"""
+        with self._lock:
+            return max(0.0, self._paused_until - time.monotonic())
+
+    def wait(self) -> None:
+        """等待该账号的暂停结束"""
+        delay = self.pause_remaining()
+        if delay > 0:
+            time.sleep(delay)
+
+    def backoff(self, attempt: int) -> float:
+        """带完全抖动的指数退避时间"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def on_success(self) -> None:
+        """请求成功：加性增加速率，原本不限速时连续成功后恢复不限速"""
+        with self._lock:
+            self._stats[OK] += 1
+            self._success_streak += 1
+            rate = self.rate_limiter.rate
+            if rate > 0 and self.unlimited and self._success_streak >= self.recovery_successes:
+                self.rate_limiter.set_rate(0)
+            elif 0 < rate < self.max_rate:
+                self.rate_limiter.set_rate(min(self.max_rate, rate + self.rate_increase))
+
+    def on_failure(self, kind: str, attempt: int, headers: Optional[Mapping[str, str]] = None) -> float:
+        """记录一次失败并返回重试前需要等待的秒数
+
+        Args:
+            kind: 响应分类
+            attempt: 第几次尝试（从 0 开始）
+            headers: 响应头，用于读取 Retry-After
+        """
+        retry_after = parse_retry_after(headers)
+        delay = retry_after if retry_after is not None else self.backoff(attempt)
+
+        with self._lock:
+            self._stats[kind] += 1
+            if kind in (THROTTLED, SERVER_ERROR):
+                self._success_streak = 0
+                now = time.monotonic()
+                if now >= self._last_decrease + self.decrease_window:
+                    # 乘性降低速率，每个拥塞窗口只降低一次
+                    self._last_decrease = now
+                    rate = self.rate_limiter.rate
+                    new_rate = rate * self.rate_decrease if rate > 0 else self.fallback_rate
+                    self.rate_limiter.set_rate(max(self.min_rate, new_rate))
+            if kind == THROTTLED:
+                # 被限流时使用该账号的请求一起暂停
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    def stats(self) -> Dict[str, float]:
+        """返回各类响应的计数及当前速率"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['rate'] = self.rate_limiter.rate
+        return stats
@@ -4,9 +4,32 @@ import os
 import re
 import json
 import logging
-from typing import Dict, List, Optional
+import threading
+from typing import Collection, Dict, List, Optional, TextIO, Tuple
 from datetime import datetime
 
+from .index import DownloadIndex, content_hash
+from .markup import RenderedReader
+from .search import SearchIndex
+from .storage import NOVEL_SUFFIXES, TextStorage, open_novel, storage_for_path
+
+# 小说文件中元数据与正文之间的分隔线
+SEPARATOR = "="*50
+
+# 合并时分块复制正文的大小（字符）
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# 元数据字段名
+HEADER_FIELDS = {
+    '标题': 'title',
+    '作者': 'author',
+    '创建时间': 'create_date',
+    '标签': 'tags',
+    '链接': 'url',
+    '序号': 'order',
+    '系列ID': 'series_id',
+}
+
 def setup_logging(level: str = 'INFO') -> None:
     """设置日志配置"""
     logging.basicConfig(
@@ -18,14 +41,79 @@ def clean_filename(filename: str) -> str:
     """清理文件名中的非法字符"""
     return "".join(x for x in filename if x.isalnum() or x in (' ', '-', '_'))
 
-def get_downloaded_novels(series_dir: str) -> set:
-    """获取已下载的小说ID列表"""
+def get_novel_dir(novel_info: Dict, download_path: str) -> str:
+    """获取小说的保存目录：系列作品保存在系列目录，单独作品保存在主目录"""
+    if novel_info.get('series_info'):
+        return os.path.join(download_path, novel_info['series_info']['title'])
+    return download_path
+
+def is_novel_file(filename: str) -> bool:
+    """判断是否为小说章节文件（任意存储格式）"""
+    return filename.endswith(NOVEL_SUFFIXES) and filename != 'series_completed.txt'
+
+def parse_header(lines: List[str]) -> Dict[str, str]:
+    """解析小说文件开头的元数据行"""
+    header = {}
+    for line in lines:
+        key, sep, value = line.rstrip('\n').partition('：')
+        if sep and key in HEADER_FIELDS:
+            header[HEADER_FIELDS[key]] = value
+    url = header.get('url', '')
+    if 'show.php?id=' in url:
+        header['id'] = url.split('show.php?id=')[1].split()[0]
+    return header
+
+def read_header_lines(f: TextIO) -> Optional[List[str]]:
+    """读取元数据行，读取后文件位置停在正文开头；没有分隔线时返回 None"""
+    header_lines = []
+    while True:
+        line = f.readline()
+        if not line:
+            return None
+        if line.rstrip('\n') == SEPARATOR:
+            return header_lines
+        header_lines.append(line)
+
+def read_novel_file(filepath: str) -> Tuple[Dict[str, str], str]:
+    """读取小说文件，返回元数据和正文"""
+    with open_novel(filepath) as f:
+        header_lines = read_header_lines(f) or []
+        f.readline()  # 分隔线后的空行
+        return parse_header(header_lines), f.read()
+
+def copy_stripped(src: TextIO, dst: TextIO, chunk_size: int = COPY_CHUNK_SIZE) -> None:
+    """分块复制文本，去掉首尾空白，内存占用与文件大小无关"""
+    pending = ''
+    started = False
+    for chunk in iter(lambda: src.read(chunk_size), ''):
+        if not started:
+            chunk = chunk.lstrip()
+            if not chunk:
+                continue
+            started = True
+        stripped = chunk.rstrip()
+        if stripped:
+            dst.write(pending + stripped)
+            pending = chunk[len(stripped):]
+        else:
+            pending += chunk
+
+def get_downloaded_novels(series_dir: str, index: Optional[DownloadIndex] = None) -> set:
+    """获取已下载的小说ID列表
+
+    Args:
+        series_dir: 系列目录
+        index: 下载索引，提供时直接查询索引而不读取文件（文件已被删除的章节不计入）
+    """
+    if index is not None:
+        return index.downloaded_ids(series_dir)
+    
     downloaded = set()
     if os.path.exists(series_dir):
         for file in os.listdir(series_dir):
-            if file.endswith('.txt') and file != 'series_completed.txt':
+            if is_novel_file(file):
                 try:
-                    with open(os.path.join(series_dir, file), 'r', encoding='utf-8') as f:
+                    with open_novel(os.path.join(series_dir, file)) as f:
                         content = f.read()
                         if 'pixiv.net/novel/show.php?id=' in content:
                             novel_id = content.split('pixiv.net/novel/show.php?id=')[1].split()[0]
@@ -34,39 +122,271 @@ def get_downloaded_novels(series_dir: str) -> set:
                     continue
     return downloaded
 
-def save_novel(novel_info: Dict, output_dir: str) -> Optional[str]:
-    """保存小说到文件"""
+def novel_filename(novel_info: Dict, suffix: str = TextStorage.suffix) -> str:
+    """小说文件名：清理后的标题加小说ID，标题相同的章节不会互相覆盖"""
+    title = clean_filename(novel_info['title']).strip()
+    return f"{title}_{novel_info['id']}{suffix}" if title else f"{novel_info['id']}{suffix}"
+
+def format_header(novel_info: Dict) -> str:
+    """生成小说文件开头的元数据（含分隔线前的空行）"""
+    series_info = novel_info.get('series_info')
+    series_order = series_info.get('order') if series_info else None
+    lines = [
+        f"标题：{novel_info['title']}\n",
+        f"作者：{novel_info['author']}\n",
+        f"创建时间：{novel_info['create_date']}\n",
+        f"标签：{', '.join(novel_info['tags'])}\n",
+        f"链接：https://www.pixiv.net/novel/show.php?id={novel_info['id']}\n",
+    ]
+    if series_order is not None:
+        lines.append(f"序号：{series_order}\n")
+    if series_info and series_info.get('id'):
+        lines.append(f"系列ID：{series_info['id']}\n")
+    lines.append("\n")
+    return ''.join(lines)
+
+def _is_unchanged(path: str, header: str, digest: str, record: Optional[Dict]) -> bool:
+    """已保存的文件与将要写入的内容是否相同
+
+    有索引记录时只比较元数据和正文哈希，不读取正文。
+    """
+    if not os.path.exists(path):
+        return False
+    if record is not None:
+        if record['content_hash'] != digest:
+            return False
+        with open_novel(path) as f:
+            return ''.join(read_header_lines(f) or []) == header
+    with open_novel(path) as f:
+        if ''.join(read_header_lines(f) or []) != header:
+            return False
+        f.readline()  # 分隔线后的空行
+        return content_hash(f.read()) == digest
+
+def write_atomic(path: str, data: bytes) -> None:
+    """先写入同目录的临时文件并 fsync，再重命名为目标文件
+
+    写入中途崩溃只会留下 .tmp 文件，不会出现截断的小说文件。
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def find_novel_files(output_dir: str, novel_info: Dict, exclude: Collection[str] = ()) -> List[str]:
+    """查找同一篇小说以旧文件名或其他存储格式保存的文件
+
+    只检查这篇小说可能使用的文件名：每种存储格式下的新文件名（标题_ID）和
+    旧文件名（只有标题），不列出目录。旧文件名不含小说ID，存在时读取元数据中的
+    链接确认是同一篇小说。
+
+    Args:
+        output_dir: 保存目录
+        novel_info: 小说信息
+        exclude: 不计入结果的文件路径
+    """
+    exclude = {os.path.abspath(path) for path in exclude}
+    legacy_title = clean_filename(novel_info['title'])
+    candidates = []
+    for suffix in NOVEL_SUFFIXES:
+        candidates.append((novel_filename(novel_info, suffix), False))
+        if legacy_title:
+            candidates.append((legacy_title + suffix, True))
+
+    found = []
+    for filename, verify in candidates:
+        path = os.path.join(output_dir, filename)
+        if not is_novel_file(filename) or os.path.abspath(path) in exclude or not os.path.exists(path):
+            continue
+        if verify:
+            try:
+                with open_novel(path) as f:
+                    header_lines = read_header_lines(f)
+            except Exception as e:
+                logging.warning(f"读取文件失败 {path}: {str(e)}")
+                continue
+            if header_lines is None or parse_header(header_lines).get('id') != str(novel_info['id']):
+                continue
+        found.append(path)
+    return found
+
+def save_novel(novel_info: Dict, output_dir: str, index: Optional[DownloadIndex] = None,
+               storage: Optional[TextStorage] = None,
+               search_index: Optional[SearchIndex] = None) -> Optional[str]:
+    """保存小说到文件
+
+    文件名包含小说ID；内容与已保存的文件相同时不重写。同一篇小说以旧文件名
+    保存的文件会被新文件取代，目录中不会留下重复的章节。
+
+    Args:
+        novel_info: 小说信息
+        output_dir: 保存目录
+        index: 下载索引，提供时保存后记录到索引
+        storage: 存储格式，默认为纯文本
+        search_index: 全文索引，提供时同步更新
+    """
     try:
+        storage = storage or TextStorage()
         os.makedirs(output_dir, exist_ok=True)
-        title = clean_filename(novel_info['title'])
-        output_file = os.path.join(output_dir, f"{title}.txt")
+        series_info = novel_info.get('series_info')
+        output_file = os.path.join(output_dir, novel_filename(novel_info, storage.suffix))
+        header = format_header(novel_info)
+        digest = content_hash(novel_info['content'])
+        
+        # 已索引的文件在同一目录下时沿用原路径（兼容旧的文件名和存储格式）；
+        # 没有索引记录时按小说ID查找以旧文件名或其他存储格式保存的文件
+        record = index.get(novel_info['id']) if index is not None else None
+        if record and os.path.dirname(os.path.abspath(record['path'])) == os.path.abspath(output_dir) \
+                and os.path.exists(record['path']):
+            previous_file = record['path']
+            # 索引指向当前存储格式的文件时不会有其他格式的副本，不再检查
+            duplicates = [] if storage_for_path(previous_file).suffix == storage.suffix \
+                else find_novel_files(output_dir, novel_info, (previous_file,))
+        else:
+            previous_file = output_file
+            record = None
+            duplicates = find_novel_files(output_dir, novel_info, (output_file,))
+            if duplicates and not os.path.exists(output_file):
+                previous_file = duplicates.pop(0)
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(f"标题：{novel_info['title']}\n")
-            f.write(f"作者：{novel_info['author']}\n")
-            f.write(f"创建时间：{novel_info['create_date']}\n")
-            f.write(f"标签：{', '.join(novel_info['tags'])}\n")
-            f.write(f"链接：https://www.pixiv.net/novel/show.php?id={novel_info['id']}\n")
-            f.write("\n" + "="*50 + "\n\n")
-            f.write(novel_info['content'])
+        unchanged = _is_unchanged(previous_file, header, digest, record)
+        if unchanged:
+            output_file = previous_file
+            logging.info(f"小说内容未变化，跳过写入: {output_file}")
+        else:
+            write_atomic(output_file, storage.encode(header + SEPARATOR + "\n\n" + novel_info['content']))
+            if previous_file != output_file and os.path.exists(previous_file):
+                # 旧文件名的文件已被新文件取代
+                os.remove(previous_file)
+            logging.info(f"小说已保存至: {output_file}")
+        for duplicate in duplicates:
+            # 同一篇小说的多余文件，保留会使合并结果重复
+            if os.path.abspath(duplicate) == os.path.abspath(output_file) or not os.path.exists(duplicate):
+                continue
+            os.remove(duplicate)
+            logging.info(f"已删除重复的文件: {duplicate}")
+        
+        if index is not None:
+            index.record(novel_info['id'], output_file, digest,
+                         series_id=series_info['id'] if series_info else None,
+                         title=novel_info['title'],
+                         series_order=series_info.get('order') if series_info else None,
+                         author=novel_info['author'], create_date=novel_info['create_date'],
+                         tags=novel_info['tags'])
         
-        logging.info(f"小说已保存至: {output_file}")
-        return output_file
     except Exception as e:
         logging.error(f"保存小说失败: {str(e)}")
         return None
+    
+    # 全文索引失败不影响保存结果，之后可用 reindex 补建
+    if search_index is not None:
+        try:
+            if not (unchanged and search_index.contains(novel_info['id'])):
+                search_index.add(novel_info['id'], output_file, novel_info['title'], novel_info['author'],
+                                 novel_info['tags'], novel_info['content'])
+        except Exception as e:
+            logging.error(f"更新全文索引失败 {novel_info['id']}: {str(e)}")
+    
+    return output_file
 
 def mark_series_completed(series_dir: str) -> None:
     """标记系列已完成"""
     with open(os.path.join(series_dir, 'series_completed.txt'), 'w') as f:
         f.write('completed')
 
-def merge_series(series_dir: str, output_filename: Optional[str] = None) -> Optional[str]:
+def chapter_order(header: Dict[str, str], filename: str) -> float:
+    """推算章节排序值
+
+    优先使用保存时记录的系列序号；旧版本下载的文件没有序号，
+    依次从标题、文件名、小说ID中推测。
+    """
+    if header.get('order', '').isdigit():
+        return int(header['order'])
+    # 1. 从标题中提取数字章节号
+    title_match = re.search(r'第(\d+)章', header.get('title', ''))
+    if title_match:
+        return int(title_match.group(1))
+    # 2. 从文件名中提取数字
+    num_match = re.search(r'(\d+)', filename)
+    if num_match:
+        return int(num_match.group(1))
+    # 3. 从链接ID中提取数字作为时间顺序
+    if header.get('id', '').isdigit():
+        return int(header['id'])
+    return float('inf')  # 默认放到最后
+
+def get_series_chapters(series_dir: str, index: Optional[DownloadIndex] = None) -> List[Dict]:
+    """按章节顺序列出系列目录中的章节文件
+
+    已在下载索引中记录序号的章节不需要打开文件，其余章节只读取元数据。
+
+    Returns:
+        章节列表，包含 order、filename、title，按章节顺序排列
+    """
+    files = [f for f in os.listdir(series_dir) if is_novel_file(f)]
+    novels = []
+    indexed = set()
+    if index is not None:
+        file_set = set(files)
+        for chapter in index.series_chapters(series_dir):
+            filename = os.path.basename(chapter['path'])
+            if chapter['series_order'] is None or not chapter['title'] or filename not in file_set:
+                continue
+            novels.append({
+                'order': chapter['series_order'],
+                'filename': filename,
+                'title': chapter['title']
+            })
+            indexed.add(filename)
+    
+    # 索引中没有序号的章节，读取元数据推算顺序
+    for filename in files:
+        if filename in indexed:
+            continue
+        filepath = os.path.join(series_dir, filename)
+        try:
+            with open_novel(filepath) as f:
+                header_lines = read_header_lines(f)
+            if header_lines is None:
+                continue
+            header = parse_header(header_lines)
+            if 'title' not in header:
+                # 不是章节文件（如之前的合并结果）
+                continue
+            order = chapter_order(header, filename)
+            novels.append({
+                'order': order,
+                'filename': filename,
+                'title': header['title']
+            })
+            logging.info(f"读取文件 {filename} 成功，排序值: {order}")
+        except Exception as e:
+            logging.warning(f"读取文件失败 {filename}: {str(e)}")
+            continue
+    
+    # 按章节序号排序
+    novels.sort(key=lambda x: (x['order'], x['filename']))
+    return novels
+
+def merge_series(series_dir: str, output_filename: Optional[str] = None,
+                 index: Optional[DownloadIndex] = None) -> Optional[str]:
     """合并系列小说
+
+    分两遍处理：第一遍确定章节顺序并生成目录（get_series_chapters）；
+    第二遍逐章分块复制正文到输出文件，同时把 pixiv 标记转换为纯文本，
+    内存占用与系列大小无关。
     
     Args:
         series_dir: 系列小说所在目录
         output_filename: 输出文件名（可选）
+        index: 下载索引（可选）
         
     Returns:
         合并后的文件路径，失败则返回 None
@@ -76,61 +396,17 @@ def merge_series(series_dir: str, output_filename: Optional[str] = None) -> Opti
             logging.error(f"系列目录不存在: {series_dir}")
             return None
             
-        # 获取所有txt文件（排除series_completed.txt）
-        files = [f for f in os.listdir(series_dir) if f.endswith('.txt') and f != 'series_completed.txt']
-        if not files:
+        # 获取所有小说文件（排除series_completed.txt）
+        if not any(is_novel_file(f) for f in os.listdir(series_dir)):
             logging.error(f"目录中没有找到小说文件: {series_dir}")
             return None
             
-        # 读取所有文件的内容和元数据
-        novels = []
-        for filename in files:
-            filepath = os.path.join(series_dir, filename)
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    # 分离元数据和正文
-                    parts = content.split("="*50)
-                    if len(parts) >= 2:
-                        metadata = parts[0].strip()
-                        novel_content = parts[1].strip()
-                        
-                        # 提取章节序号的不同方式
-                        order = float('inf')  # 默认放到最后
-                        
-                        # 1. 从标题中提取数字章节号
-                        title_match = re.search(r'标题：.*?第(\d+)章', metadata)
-                        if title_match:
-                            order = int(title_match.group(1))
-                        else:
-                            # 2. 从文件名中提取数字
-                            num_match = re.search(r'(\d+)', filename)
-                            if num_match:
-                                order = int(num_match.group(1))
-                            else:
-                                # 3. 从链接ID中提取数字作为时间顺序
-                                id_match = re.search(r'id=(\d+)', metadata)
-                                if id_match:
-                                    order = int(id_match.group(1))
-                        
-                        novels.append({
-                            'order': order,
-                            'filename': filename,
-                            'metadata': metadata,
-                            'content': novel_content
-                        })
-                        logging.info(f"读取文件 {filename} 成功，排序值: {order}")
-            except Exception as e:
-                logging.warning(f"读取文件失败 {filename}: {str(e)}")
-                continue
-        
+        # 第一遍：确定章节顺序
+        novels = get_series_chapters(series_dir, index)
         if not novels:
             logging.error("没有成功读取任何小说文件")
             return None
         
-        # 按章节序号排序
-        novels.sort(key=lambda x: x['order'])
-        
         # 生成输出文件名
         if not output_filename:
             series_name = os.path.basename(series_dir)
@@ -139,29 +415,29 @@ def merge_series(series_dir: str, output_filename: Optional[str] = None) -> Opti
         
         output_path = os.path.join(series_dir, output_filename)
         
-        # 写入合并后的文件
+        # 第二遍：写入合并后的文件
         with open(output_path, 'w', encoding='utf-8') as f:
             # 写入系列信息
             f.write(f"系列名称：{os.path.basename(series_dir)}\n")
             f.write(f"合并时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write(f"总章节数：{len(novels)}\n")
-            f.write("\n" + "="*50 + "\n\n")
+            f.write("\n" + SEPARATOR + "\n\n")
             
             # 写入目录
             f.write("目录\n\n")
             for i, novel in enumerate(novels, 1):
-                title = re.search(r'标题：(.*?)\n', novel['metadata'])
-                if title:
-                    f.write(f"{i}. {title.group(1)}\n")
-            f.write("\n" + "="*50 + "\n\n")
+                f.write(f"{i}. {novel['title']}\n")
+            f.write("\n" + SEPARATOR + "\n\n")
             
-            # 写入正文
+            # 逐章复制正文
             for i, novel in enumerate(novels, 1):
-                f.write(f"\n\n第 {i} 章\n")
-                f.write(novel['metadata'])
-                f.write("\n" + "="*50 + "\n\n")
-                f.write(novel['content'])
-                f.write("\n\n" + "="*50 + "\n")
+                with open_novel(os.path.join(series_dir, novel['filename'])) as src:
+                    header_lines = read_header_lines(src) or []
+                    f.write(f"\n\n第 {i} 章\n")
+                    f.write(''.join(header_lines).strip())
+                    f.write("\n" + SEPARATOR + "\n\n")
+                    copy_stripped(RenderedReader(src), f)
+                f.write("\n\n" + SEPARATOR + "\n")
         
         logging.info(f"系列小说已合并至: {output_path}")
         return output_path
@@ -170,4 +446,4 @@ def merge_series(series_dir: str, output_filename: Optional[str] = None) -> Opti
         logging.error(f"合并系列小说失败: {str(e)}")
         import traceback
         logging.error(traceback.format_exc())
-        return None 
\ No newline at end of file
+        return None
@@ -0,0 +1,165 @@
+"""系列追踪模块
+
+记录需要追踪更新的系列及其已下载到的章节序号，sync 时只检查并下载新章节。
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from . import utils
+
+WATCHLIST_FILENAME = 'watchlist.json'
+
+
+class Watchlist:
+    """追踪的系列列表，保存在下载目录的 watchlist.json 中"""
+
+    def __init__(self, download_path: str):
+        """加载追踪列表
+
+        Args:
+            download_path: 下载目录
+        """
+        self.path = os.path.join(download_path, WATCHLIST_FILENAME)
+        self._lock = threading.Lock()
+        self.series = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.series = json.load(f)
+
+    def save(self) -> None:
+        """写入追踪列表"""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.series, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def add(self, series_id: str, title: str) -> bool:
+        """添加系列，已存在时返回 False"""
+        series_id = str(series_id)
+        with self._lock:
+            if series_id in self.series:
+                return False
+            self.series[series_id] = {
+                'title': title,
+                'last_order': 0,
+                'last_checked': None
+            }
+        return True
+
+    def remove(self, series_id: str) -> bool:
+        """移除系列，不存在时返回 False"""
+        with self._lock:
+            return self.series.pop(str(series_id), None) is not None
+
+    def update(self, series_id: str, last_order: int) -> None:
+        """记录系列的检查时间和已下载到的章节序号"""
+        with self._lock:
+            entry = self.series[str(series_id)]
+            entry['last_order'] = max(entry['last_order'], last_order)
+            entry['last_checked'] = time.time()
+
+
+def follow_series(crawler, watchlist: Watchlist, novel_id: str) -> Optional[str]:
+    """根据系列中任意一篇小说追踪该系列
+
+    Returns:
+        系列ID，不是系列作品时返回 None
+    """
+    novel_info = crawler.get_novel_info(novel_id)
+    if not novel_info or not novel_info['series_info']:
+        logging.error("不是系列作品，无法追踪")
+        return None
+
+    series_info = novel_info['series_info']
+    if watchlist.add(series_info['id'], series_info['title']):
+        watchlist.save()
+        logging.info(f"已追踪系列: {series_info['title']}")
+    else:
+        logging.info(f"系列已在追踪列表中: {series_info['title']}")
+    return str(series_info['id'])
+
+
+def _check_series(crawler, series_id: str, entry: Dict) -> Tuple[str, int, List[Dict]]:
+    """检查一个系列
+
+    Returns:
+        (系列目录, 目录中最大的章节序号, 序号大于已记录序号且未下载的章节)
+    """
+    series_dir = os.path.join(crawler.config['DOWNLOAD_PATH'], entry['title'])
+    chapters = crawler.series_enumerator.list_chapters(series_id, revalidate=True)
+    max_order = max((chapter['order'] for chapter in chapters), default=entry['last_order'])
+    candidates = [chapter for chapter in chapters if chapter['order'] > entry['last_order']]
+    if not candidates:
+        return series_dir, max_order, []
+    downloaded = utils.get_downloaded_novels(series_dir, crawler.index)
+    return series_dir, max_order, [chapter for chapter in candidates if chapter['id'] not in downloaded]
+
+
+def sync_watchlist(crawler, watchlist: Watchlist) -> Dict[str, Dict]:
+    """同步所有追踪的系列，只下载新章节
+
+    检查阶段并发进行，每个系列通常只需一次请求（从缓存的目录末尾继续获取）。
+
+    Returns:
+        系列ID到同步结果的映射，结果包含新下载章节数 downloaded 和下载失败的
+        章节ID列表 failed；检查系列失败时 failed 为 None
+    """
+    series_items = list(watchlist.series.items())
+    if not series_items:
+        logging.info("追踪列表为空")
+        return {}
+
+    def check(item):
+        series_id, entry = item
+        try:
+            return series_id, _check_series(crawler, series_id, entry)
+        except Exception as e:
+            logging.error(f"检查系列 {series_id} 失败: {str(e)}")
+            return series_id, None
+
+    with ThreadPoolExecutor(max_workers=crawler.max_workers) as executor:
+        checked = list(executor.map(check, series_items))
+
+    results = {}
+    for series_id, result in checked:
+        if result is None:
+            results[series_id] = {'downloaded': 0, 'failed': None}
+            continue
+        series_dir, max_order, new_chapters = result
+        if not new_chapters:
+            # 没有未下载的新章节，已记录序号推进到目录末尾
+            watchlist.update(series_id, max_order)
+            results[series_id] = {'downloaded': 0, 'failed': []}
+            continue
+
+        logging.info(f"系列 {watchlist.series[series_id]['title']} 有 {len(new_chapters)} 篇新章节")
+        downloaded = crawler.download_novels([c['id'] for c in new_chapters], series_dir)
+        failed = [c for c in new_chapters if not downloaded.get(c['id'])]
+        last_order = min(c['order'] for c in failed) - 1 if failed else max_order
+        watchlist.update(series_id, last_order)
+        results[series_id] = {
+            'downloaded': sum(1 for ok in downloaded.values() if ok),
+            'failed': [c['id'] for c in failed],
+        }
+
+    watchlist.save()
+    logging.info(f"同步完成，共 {len(series_items)} 个系列，新下载 {count_synced(results)} 篇")
+    return results
+
+
+def count_synced(results: Dict[str, Dict]) -> int:
+    """sync_watchlist 结果中新下载的章节总数"""
+    return sum(result['downloaded'] for result in results.values())
+
+
+def failed_series(results: Dict[str, Dict]) -> List[str]:
+    """sync_watchlist 结果中检查失败或有章节下载失败的系列ID"""
+    return [series_id for series_id, result in results.items() if result['failed'] is None or result['failed']]